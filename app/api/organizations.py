@@ -1,8 +1,10 @@
 """Organizations API endpoints"""
+import asyncio
 import logging
 import os
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
 from typing import List, Optional
 from enum import Enum
 
@@ -56,6 +58,12 @@ class CreateOrganizationInvitationRequest(BaseModel):
     organization_id: int = Field(..., alias="organizationId")
     invitee_email: EmailStr = Field(..., alias="inviteeEmail")
     role_id: Optional[int] = Field(None, alias="roleId")
+    
+    @field_validator("invitee_email", mode="after")
+    @classmethod
+    def normalize_invitee_email(cls, v: str) -> str:
+        """Invitation emails are stored and compared lower-cased"""
+        return v.lower()
 
 
 class OrganizationInvitationResponse(BaseModel):
@@ -77,13 +85,15 @@ class OrganizationInvitationResponse(BaseModel):
 
 
 class AcceptOrganizationInvitationRequest(BaseModel):
-    token: str
+    # URL-safe base64 or legacy UUID; anything else cannot match an invitation
+    token: str = Field(..., pattern=r"^[A-Za-z0-9_-]+$")
 
 
 class OrganizationInvitationsListResponse(BaseModel):
     organization_id: int
     total_pending: int
     invitations: List[OrganizationInvitationResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page
 
 
 # ============================================
@@ -132,62 +142,45 @@ async def get_organization_members(organization_id: int):
     - List of members with user data (email, name, avatar)
     - Role information
     """
-    print(f"\n{'='*60}")
-    print(f"📋 Get Organization Members")
-    print(f"   Organization ID: {organization_id}")
-    print(f"{'='*60}")
-    
-    logger.info(f"Fetching members for organization {organization_id}")
+    logger.info("Fetching members for organization %s", organization_id)
     
     # Initialize services
     org_repo = OrganizationRepository(supabase)
     org_service = OrganizationService(org_repo, supabase)
     
-    # Get organization
-    org = await org_service.get_organization_or_404(organization_id)
-    print(f"✅ Organization: {org.name}")
+    # Get organization (only its name is shown, so a cached row is fine)
+    org = await org_service.get_organization_or_404(organization_id, allow_stale=True)
     
-    # Get all active members
-    org_members = org_service.get_organization_members(organization_id)
-    print(f"   Found {len(org_members)} members")
-    
-    if not org_members:
-        return OrganizationMembersResponse(
-            organization_id=organization_id,
-            organization_name=org.name,
-            total_members=0,
-            members=[]
-        )
+    # Get all active members with user data (profiles, emails, roles)
+    org_members = await asyncio.to_thread(org_service.get_organization_members, organization_id)
+    logger.debug("Organization %s (%s): %d members", org.id, org.name, len(org_members))
     
-    # Enrich members with user data (profiles, emails, roles)
-    enriched_members = await org_service.enrich_members_with_user_data(org_members)
-    
-    # Convert to response models
+    # Convert to response models (rows come from our own DB, skip re-validation)
     members_data = [
-        OrganizationMemberResponse(
+        OrganizationMemberResponse.model_construct(
             id=m['id'],
             user_id=m['user_id'],
             organization_id=m['organization_id'],
             role_id=m.get('role_id'),
             status=m['status'],
             created_at=m['created_at'],
-            email=m['email'],
+            email=m.get('email') or 'unknown@example.com',
             name=m.get('name'),
             avatar_url=m.get('avatar_url'),
             role_name=m.get('role_name')
         )
-        for m in enriched_members
+        for m in org_members
     ]
     
-    print(f"✅ Successfully retrieved {len(members_data)} members")
-    print(f"{'='*60}\n")
-    
-    return OrganizationMembersResponse(
+    response = OrganizationMembersResponse(
         organization_id=organization_id,
         organization_name=org.name,
         total_members=len(members_data),
         members=members_data
     )
+    # Serialize in pydantic-core and skip FastAPI's re-validation +
+    # jsonable_encoder + json.dumps pass over every member
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
 
 # ============================================
@@ -208,40 +201,34 @@ async def update_member_role(
     
     Requires: Owner or Admin role
     """
-    print(f"\n{'='*60}")
-    print(f"👤 Update Member Role")
-    print(f"   User ID: {user_id}")
-    print(f"   Organization ID: {req.organization_id}")
-    print(f"   Member ID: {req.member_id}")
-    print(f"   New Role ID: {req.role_id}")
-    print(f"{'='*60}")
+    logger.debug(
+        "Update member role: user=%s org=%s member=%s role=%s",
+        user_id, req.organization_id, req.member_id, req.role_id
+    )
     
     # Initialize services
     org_repo = OrganizationRepository(supabase)
     org_service = OrganizationService(org_repo, supabase)
     
     # Authorization & validation
-    org = await org_service.get_organization_or_404(req.organization_id)
-    print(f"✅ Organization: {org.name}")
+    await org_service.get_organization_or_404(req.organization_id)
     
     await org_service.verify_user_is_owner_or_admin(req.organization_id, user_id)
-    print(f"✅ User authorized")
     
     org_service.validate_role_assignable(req.role_id)
     
-    member = org_service.get_organization_member(req.member_id, req.organization_id)
+    member = await asyncio.to_thread(
+        org_service.get_organization_member, req.member_id, req.organization_id
+    )
     org_service.validate_not_self(member['user_id'], user_id, "update your own role")
     
     # Update role
-    org_service.update_member_role(req.member_id, req.role_id)
+    await asyncio.to_thread(org_service.update_member_role, req.member_id, req.role_id)
     
     # Get new role name
-    role = org_service.get_role_by_id(req.role_id)
+    role = await asyncio.to_thread(org_service.get_role_by_id, req.role_id)
     role_name = role['name'] if role else None
     
-    print(f"✅ Role updated successfully")
-    print(f"{'='*60}\n")
-    
     return UpdateMemberRoleResponse(
         success=True,
         message=f"Member role updated to {role_name}",
@@ -266,12 +253,10 @@ async def delete_member(
     
     Requires: Owner or Admin role
     """
-    print(f"\n{'='*60}")
-    print(f"🗑️  Delete Member")
-    print(f"   User ID: {user_id}")
-    print(f"   Organization ID: {req.organization_id}")
-    print(f"   Member ID: {req.member_id}")
-    print(f"{'='*60}")
+    logger.debug(
+        "Delete member: user=%s org=%s member=%s",
+        user_id, req.organization_id, req.member_id
+    )
     
     # Initialize services
     org_repo = OrganizationRepository(supabase)
@@ -279,24 +264,21 @@ async def delete_member(
     
     # Authorization & validation
     org = await org_service.get_organization_or_404(req.organization_id)
-    print(f"✅ Organization: {org.name}")
     
     await org_service.verify_user_is_owner_or_admin(req.organization_id, user_id)
-    print(f"✅ User authorized")
     
-    member = org_service.get_organization_member(req.member_id, req.organization_id)
+    member = await asyncio.to_thread(
+        org_service.get_organization_member, req.member_id, req.organization_id
+    )
     org_service.validate_member_is_not_owner(member)
     org_service.validate_not_self(member['user_id'], user_id, "delete yourself from the organization")
     
     # Delete member
-    org_service.deactivate_member(req.member_id)
+    await asyncio.to_thread(org_service.deactivate_member, req.member_id)
     
     # Update active_member_count
     await org_service.decrement_active_member_count(org)
     
-    print(f"✅ Member deleted successfully")
-    print(f"{'='*60}\n")
-    
     return DeleteMemberResponse(
         success=True,
         message="Member removed from organization"
@@ -318,99 +300,57 @@ async def create_organization_invitation(
     """
     Create an email invitation to join an organization
     
-    Flow:
+    Flow (single transaction in the create_organization_invitation RPC):
     1. Validate organization exists
     2. Verify user is owner/admin
     3. Verify organization is on Business plan (only Business plans support invitations)
     4. Check if invitee already a member
-    5. Check for existing pending invitation
-    6. Check available seats
-    7. Generate invitation token
-    8. Create invitation with 7-day expiry
-    9. Return invitation link
+    5. Check available seats
+    6. Generate invitation token
+    7. Create invitation with 7-day expiry
+       (a unique index rejects a second pending invitation for the same email)
+    8. Return invitation link
     
     Requires: 
     - Owner or Admin role
     - Business plan subscription
     """
-    print(f"\n{'='*60}")
-    print(f"📨 Create Organization Invitation")
-    print(f"   User ID: {user_id}")
-    print(f"   Organization ID: {req.organization_id}")
-    print(f"   Invitee Email: {req.invitee_email}")
-    print(f"{'='*60}")
+    logger.debug(
+        "Create invitation: user=%s org=%s email=%s",
+        user_id, req.organization_id, req.invitee_email
+    )
     
     # Initialize services
     org_repo = OrganizationRepository(supabase)
     org_service = OrganizationService(org_repo, supabase)
     
-    # 1. Get organization
-    org = await org_service.get_organization_or_404(req.organization_id)
-    print(f"✅ Organization: {org.name} (Plan: {org.plan_type})")
-    
-    # 2. Verify user is owner/admin
-    await org_service.verify_user_is_owner_or_admin(req.organization_id, user_id)
-    print(f"✅ User authorized")
-    
-    # 3. Verify organization is on Business plan
-    org_service.validate_business_plan_for_invitations(org)
-    print(f"✅ Business plan verified")
-    
-    # 4. Check if invitee email already exists as member
-    await org_service.validate_user_not_member(req.organization_id, req.invitee_email)
-    
-    # 5. Check for existing pending invitation
-    existing_invite = org_service.check_existing_pending_invitation(
-        req.organization_id,
-        req.invitee_email
-    )
-    if existing_invite:
-        raise HTTPException(
-            status_code=400,
-            detail="A pending invitation already exists for this email"
-        )
-    
-    # 6. Check available seats
-    pending_count = org_service.get_pending_invitations_count(req.organization_id)
-    org_service.validate_seats_available_for_invitation(org, pending_count)
-    print(f"✅ Sufficient seats available")
-    
-    # 7-8. Create invitation
-    invitation = org_service.create_invitation(
+    # 1-7. Validate and create the invitation in one round trip
+    created = await asyncio.to_thread(
+        org_service.create_invitation,
         organization_id=req.organization_id,
         inviter_id=user_id,
         invitee_email=req.invitee_email,
         role_id=req.role_id,
         expires_in_days=7
     )
+    invitation = created['invitation']
     
-    print(f"✅ Invitation created: {invitation['id']}")
-    
-    # 9. Get role name if role_id provided
-    role_name = None
-    if req.role_id:
-        role = org_service.get_role_by_id(req.role_id)
-        role_name = role['name'] if role else None
-    
-    # 10. Get inviter name
-    inviter_name = await org_service.get_inviter_name(user_id)
+    logger.debug("Invitation %s created for org %s", invitation['id'], req.organization_id)
     
+    # 8. Return invitation link
     invitation_link = org_service.generate_invitation_link(invitation['token'], FRONTEND_URL)
     
-    print(f"🔗 Invitation Link: {invitation_link}")
-    print(f"{'='*60}\n")
-    
     return OrganizationInvitationResponse(
         id=invitation['id'],
-        organization_id=org.id,
-        organization_name=org.name,
+        organization_id=invitation['organization_id'],
+        organization_name=created['organization_name'],
         inviter_id=invitation['inviter_id'],
-        inviter_name=inviter_name,
+        inviter_name=created.get('inviter_name'),
         invitee_email=invitation['invitee_email'],
         invitee_id=invitation.get('invitee_id'),
         token=invitation['token'],
         role_id=req.role_id,
-        role_name=role_name,
+        role_name=created.get('role_name'),
         status=invitation['status'],
         expires_at=invitation['expires_at'],
         created_at=invitation['created_at'],
@@ -427,141 +367,106 @@ async def accept_organization_invitation(
     """
     Accept an organization invitation
     
-    Flow:
+    Flow (single transaction in the accept_organization_invitation RPC):
     1. Validate token and check expiry
-    2. Get current user (must be authenticated)
+    2. Lock the organization row
     3. Check if user is already a member
     4. Check if organization has available seats (Business plan)
     5. Add user to organization_members
     6. Update invitation status to 'accepted'
-    7. Update organization.active_member_count
+    7. Increment organization.active_member_count
     8. Return success
     """
-    print(f"\n{'='*60}")
-    print(f"✅ Accept Organization Invitation")
-    print(f"   User ID: {user_id}")
-    print(f"   Token: {req.token}")
-    print(f"{'='*60}")
+    logger.debug("Accept invitation: user=%s", user_id)
     
     # Initialize services
     org_repo = OrganizationRepository(supabase)
     org_service = OrganizationService(org_repo, supabase)
     
-    # 1. Get invitation and check expiry
-    invitation = org_service.get_invitation_by_token(req.token, status="pending")
-    
-    if org_service.check_invitation_expiry(invitation):
-        org_service.mark_invitation_expired(invitation['id'])
-        raise HTTPException(status_code=400, detail="Invitation has expired")
+    outcome = await asyncio.to_thread(org_service.accept_invitation, req.token, user_id)
     
-    # 2. Get organization
-    org = await org_service.get_organization_or_404(invitation['organization_id'])
-    print(f"📋 Organization: {org.name}")
-    print(f"   Invitee: {invitation['invitee_email']}")
-    
-    # 3. Check if already a member
-    if org_service.check_user_is_member(org.id, user_id):
-        # Already a member - just mark invitation as accepted
-        org_service.mark_invitation_accepted(invitation['id'], user_id)
-        
+    if outcome['status'] == 'already_member':
         return {
             "success": True,
-            "organization_id": org.id,
-            "organization_name": org.name,
+            "organization_id": outcome['organization_id'],
+            "organization_name": outcome['organization_name'],
             "message": "You are already a member of this organization"
         }
     
-    # 4. Check if organization has available seats (Business plan)
-    org_service.validate_seats_available_for_acceptance(org)
-    print(f"✅ Seat available for new member")
-    
-    # 5. Add member
-    await org_service.add_member_to_organization(
-        organization_id=org.id,
-        user_id=user_id,
-        role_id=invitation.get('role_id')
-    )
-    print(f"✅ Added user as organization member")
-    
-    # 6. Update invitation status
-    org_service.mark_invitation_accepted(invitation['id'], user_id)
-    print(f"✅ Invitation marked as accepted")
-    
-    # 7. Update active_member_count
-    await org_service.increment_active_member_count(org)
-    print(f"✅ Updated active_member_count")
-    print(f"{'='*60}\n")
-    
     return {
         "success": True,
-        "organization_id": org.id,
-        "organization_name": org.name,
+        "organization_id": outcome['organization_id'],
+        "organization_name": outcome['organization_name'],
         "message": "Successfully joined organization"
     }
 
 
 @router.get("/{organization_id}/invitations", response_model=OrganizationInvitationsListResponse)
-async def get_organization_invitations(organization_id: int):
-    """Get all invitations for an organization"""
+async def get_organization_invitations(
+    organization_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    """
+    Get invitations for an organization, newest first
+    
+    Paginated by (created_at, id): pass the returned next_cursor as
+    ?cursor= to fetch the following page; a malformed cursor is a 400.
+    total_pending counts all pending invitations, not just the ones on
+    this page.
+    """
     
     # Initialize services
     org_repo = OrganizationRepository(supabase)
     org_service = OrganizationService(org_repo, supabase)
     
-    # Get organization
-    org = await org_service.get_organization_or_404(organization_id)
+    after = org_service.decode_invitations_cursor(cursor) if cursor else None
     
-    # Get all invitations
-    invitations_data = org_service.get_all_invitations(organization_id)
+    # Get organization (only its name is shown, so a cached row is fine)
+    org = await org_service.get_organization_or_404(organization_id, allow_stale=True)
     
-    # Get role names (filter out None values)
-    role_ids = [inv['role_id'] for inv in invitations_data if inv.get('role_id') is not None]
-    roles_map = await org_service.get_roles_map(role_ids)
-    roles_names_map = {rid: r['name'] for rid, r in roles_map.items()}
-    
-    # Get inviter names
-    inviter_ids = list(set([inv['inviter_id'] for inv in invitations_data]))
-    inviters_map = {}
-    for inviter_id in inviter_ids:
-        name = await org_service.get_inviter_name(inviter_id)
-        if name:
-            inviters_map[inviter_id] = name
+    # Get one page of invitations with role and inviter names (one extra row
+    # tells us if there is more) and the pending count concurrently
+    invitations_data, pending_count = await asyncio.gather(
+        asyncio.to_thread(org_service.get_invitations_page, organization_id, limit, after),
+        asyncio.to_thread(org_service.get_pending_invitations_count, organization_id)
+    )
+    next_cursor = None
+    if len(invitations_data) > limit:
+        invitations_data = invitations_data[:limit]
+        next_cursor = org_service.encode_invitations_cursor(invitations_data[-1])
     
     # Build response
     invitations = []
-    pending_count = 0
     
     for inv in invitations_data:
-        if inv['status'] == 'pending':
-            pending_count += 1
-        
-        # Get role name for this invitation
-        inv_role_id = inv.get('role_id')
-        role_name = roles_names_map.get(inv_role_id) if inv_role_id else None
-        
-        invitations.append(OrganizationInvitationResponse(
+        # Rows come from our own DB, skip per-row re-validation
+        invitations.append(OrganizationInvitationResponse.model_construct(
             id=inv['id'],
             organization_id=inv['organization_id'],
             organization_name=org.name,
             inviter_id=inv['inviter_id'],
-            inviter_name=inviters_map.get(inv['inviter_id']),
+            inviter_name=inv.get('inviter_name'),
             invitee_email=inv['invitee_email'],
             invitee_id=inv.get('invitee_id'),
             token=inv['token'],
-            role_id=inv_role_id,
-            role_name=role_name,
-            status=InvitationStatus(inv['status']),  # type: ignore
+            role_id=inv.get('role_id'),
+            role_name=inv.get('role_name'),
+            status=InvitationStatus(inv['status']),
             expires_at=inv['expires_at'],
             created_at=inv['created_at'],
             accepted_at=inv.get('accepted_at'),
             invitation_link=org_service.generate_invitation_link(inv['token'], FRONTEND_URL)
         ))
     
-    return OrganizationInvitationsListResponse(
+    response = OrganizationInvitationsListResponse(
         organization_id=organization_id,
         total_pending=pending_count,
-        invitations=invitations
+        invitations=invitations,
+        next_cursor=next_cursor
     )
+    # Serialize in pydantic-core (see get_organization_members)
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
 
 @router.delete("/invitations/{invitation_id}")
@@ -580,7 +485,7 @@ async def cancel_organization_invitation(
     org_service = OrganizationService(org_repo, supabase)
     
     # Get invitation
-    invitation = org_service.get_invitation_by_id(invitation_id)
+    invitation = await asyncio.to_thread(org_service.get_invitation_by_id, invitation_id)
     organization_id = invitation['organization_id']
     
     # Verify user is owner/admin
@@ -590,6 +495,6 @@ async def cancel_organization_invitation(
     org_service.validate_invitation_status(invitation, "pending")
     
     # Cancel invitation
-    org_service.mark_invitation_cancelled(invitation_id)
+    await asyncio.to_thread(org_service.mark_invitation_cancelled, invitation_id)
     
     return {"success": True, "message": "Invitation cancelled"}
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
-from datetime import datetime, timezone
+import asyncio
 import logging
 
+from app.config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, supabase_http_client
 from app.infra.supabase.client import get_supabase_client
 from app.middleware.auth import get_current_user_id
 
@@ -10,6 +11,48 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
+async def ban_user(user_id: str) -> None:
+    """
+    Ban the user using Supabase Admin Auth
+    
+    Failures are logged and swallowed: the account is still soft-deleted.
+    """
+    # The service role key allows admin operations
+    # Ban duration of 876000h (100 years) effectively makes it permanent
+    try:
+        # Use admin auth to ban the user via Supabase Admin REST API
+        if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+            # Use Supabase Admin REST API to ban user
+            ban_url = f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}"
+            headers = {
+                "apikey": SUPABASE_SERVICE_ROLE_KEY,
+                "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+                "Content-Type": "application/json"
+            }
+            ban_payload = {
+                "ban_duration": "876000h"  # 100 years (effectively permanent)
+            }
+            
+            # Shared pooled client (keep-alive connections to Supabase),
+            # run in a worker thread since it is synchronous
+            ban_response = await asyncio.to_thread(
+                supabase_http_client.put,
+                ban_url,
+                json=ban_payload,
+                headers=headers,
+                timeout=10.0
+            )
+            if ban_response.status_code not in [200, 204]:
+                logger.warning(
+                    f"Could not ban user via admin API: {ban_response.status_code} - {ban_response.text}"
+                )
+        else:
+            logger.warning("SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY not set, skipping ban")
+    except Exception as e:
+        # If admin auth fails, log but continue with deleted_at update
+        logger.warning(f"Could not ban user via admin auth: {e}")
+
+
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: str,
@@ -19,6 +62,8 @@ async def delete_user(
     Delete a user account by:
     1. Banning the user via Supabase Admin Auth
     2. Setting deleted_at timestamp on user_profile
+    
+    Both steps are independent and run concurrently.
     """
     # Verify the user is deleting their own account
     if current_user_id != user_id:
@@ -30,70 +75,25 @@ async def delete_user(
     try:
         supabase = get_supabase_client()
         
-        # Ban the user using Supabase Admin Auth
-        # The service role key allows admin operations
-        # Ban duration of 876000h (100 years) effectively makes it permanent
-        try:
-            # Use admin auth to ban the user via Supabase Admin REST API
-            import httpx
-            import os
-            
-            supabase_url = os.getenv("SUPABASE_URL")
-            service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-            
-            if supabase_url and service_role_key:
-                # Use Supabase Admin REST API to ban user
-                ban_url = f"{supabase_url}/auth/v1/admin/users/{user_id}"
-                headers = {
-                    "apikey": service_role_key,
-                    "Authorization": f"Bearer {service_role_key}",
-                    "Content-Type": "application/json"
-                }
-                ban_payload = {
-                    "ban_duration": "876000h"  # 100 years (effectively permanent)
-                }
-                
-                with httpx.Client() as client:
-                    ban_response = client.put(ban_url, json=ban_payload, headers=headers, timeout=10.0)
-                    if ban_response.status_code not in [200, 204]:
-                        logger.warning(
-                            f"Could not ban user via admin API: {ban_response.status_code} - {ban_response.text}"
-                        )
-            else:
-                logger.warning("SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY not set, skipping ban")
-        except Exception as e:
-            # If admin auth fails, log but continue with deleted_at update
-            logger.warning(f"Could not ban user via admin auth: {e}")
-            # Continue with deleted_at update even if ban fails
-        
-        # Update user_profile to set deleted_at timestamp
-        # Use datetime.now(timezone.utc) instead of deprecated datetime.utcnow()
-        # Supabase will handle the datetime conversion automatically
-        now = datetime.now(timezone.utc)
-        update_response = supabase.table("user_profiles").update({
-            "deleted_at": now.isoformat()
-        }).eq("id", user_id).execute()
+        # Ban the user and set user_profile.deleted_at (soft_delete_user RPC)
+        # concurrently; the RPC returns the timestamp, or null when the
+        # profile does not exist
+        soft_delete = supabase.rpc("soft_delete_user", {"p_user": user_id})
+        _, update_response = await asyncio.gather(
+            ban_user(user_id),
+            asyncio.to_thread(soft_delete.execute)
+        )
+        deleted_at = update_response.data
         
-        # Check if update was successful
-        # Supabase returns empty list if no rows matched, or list with updated row(s) if successful
-        if not update_response.data or len(update_response.data) == 0:
+        if not deleted_at:
             raise HTTPException(
                 status_code=404,
                 detail="User profile not found or could not be updated"
             )
         
-        # Verify that deleted_at was actually set
-        updated_profile = update_response.data[0]
-        if not updated_profile.get("deleted_at"):
-            logger.error(f"Failed to set deleted_at for user {user_id}")
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to set deleted_at timestamp"
-            )
-        
         return {
             "message": "User account deleted successfully",
-            "deleted_at": updated_profile["deleted_at"]
+            "deleted_at": deleted_at
         }
         
     except HTTPException:
@@ -9,6 +9,8 @@ import httpx
 from functools import lru_cache
 import json
 
+from app.utils.token_cache import VerifiedTokenCache
+
 logger = logging.getLogger(__name__)
 
 # Get Supabase URL from environment
@@ -17,6 +19,10 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 if not SUPABASE_URL:
     logger.warning("SUPABASE_URL not set - authentication will fail")
 
+# Verified tokens -> user id
+TOKEN_CACHE_TTL = 60
+_token_cache = VerifiedTokenCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL)
+
 
 @lru_cache(maxsize=1)
 def get_supabase_jwks() -> dict:
@@ -82,6 +88,10 @@ async def get_current_user_id(
     
     token = authorization.split('Bearer ')[1]
     
+    cached_user_id = _token_cache.get(token)
+    if cached_user_id is not None:
+        return cached_user_id
+    
     try:
         # Get JWKS (cached)
         jwks = get_supabase_jwks()
@@ -142,6 +152,7 @@ async def get_current_user_id(
             )
         
         logger.info(f"Successfully authenticated user: {user_id}")
+        _token_cache.set(token, user_id, payload.get('exp'))
         return user_id
         
     except jwt.ExpiredSignatureError:
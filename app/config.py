@@ -1,5 +1,7 @@
 import os
+import httpx
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path=".env")
@@ -7,7 +9,28 @@ load_dotenv(dotenv_path=".env")
 # Supabase client
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+# One pooled HTTP client shared by every Supabase sub-client (PostgREST, auth,
+# storage) so keep-alive connections are reused across requests and the number
+# of concurrent connections stays bounded. Sized above the worker thread pool
+# that runs the blocking Supabase calls so threads don't queue on the pool, and
+# idle connections are kept for 30 s so bursts a few seconds apart reuse them.
+# Closed on app shutdown.
+supabase_http_client = httpx.Client(
+    http2=True,
+    follow_redirects=True,
+    limits=httpx.Limits(
+        max_connections=120,
+        max_keepalive_connections=80,
+        keepalive_expiry=30.0
+    ),
+    timeout=httpx.Timeout(120.0, connect=10.0)
+)
+supabase: Client = create_client(
+    SUPABASE_URL,
+    SUPABASE_SERVICE_ROLE_KEY,
+    options=SyncClientOptions(httpx_client=supabase_http_client)
+)
 
 # Webhook secret
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
@@ -1,7 +1,8 @@
 """Billing API endpoints for subscription management and Stripe webhooks"""
+import asyncio
 import logging
 import json
-from fastapi import APIRouter, Depends, Request, HTTPException, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, Request, HTTPException, Header
 from fastapi.responses import Response
 import stripe
 
@@ -41,25 +42,44 @@ stripe_router = APIRouter(prefix="/api/stripe", tags=["stripe"])
 # STRIPE WEBHOOK ENDPOINT
 # ============================================================================
 
-async def verify_webhook_signature(payload: bytes, signature: str) -> dict:
+def verify_webhook_signature(payload: bytes, signature: str) -> dict:
     """Verify Stripe webhook signature"""
     try:
         event = stripe.Webhook.construct_event(
             payload, signature, STRIPE_WEBHOOK_SECRET
         )
-        logger.info(f"Stripe webhook signature verified for event {event.get('id')}")
+        logger.info("Stripe webhook signature verified for event %s", event.get('id'))
         return event
     except ValueError as e:
-        logger.error(f"Invalid payload: {e}")
+        logger.error("Invalid payload: %s", e)
         raise HTTPException(status_code=400, detail="Invalid payload")
     except stripe.error.SignatureVerificationError as e:
-        logger.error(f"Invalid signature: {e}")
+        logger.error("Invalid signature: %s", e)
         raise HTTPException(status_code=400, detail="Invalid signature")
 
 
+async def process_webhook_event(event_type: str, event_data: dict, event_id: str) -> None:
+    """Handle a recorded webhook event after the response has been sent to Stripe"""
+    org_repo = OrganizationRepository(supabase)
+    stripe_event_repo = StripeEventRepository(supabase)
+    webhook_service = BillingWebhookService(org_repo, stripe_event_repo)
+    
+    try:
+        await webhook_service.process_webhook_event(event_type, event_data, event_id)
+        logger.info("Successfully processed webhook event %s (ID: %s)", event_type, event_id)
+    except Exception as e:
+        # The stripe_events row stays unprocessed and is re-driven later
+        logger.error(
+            "Error processing webhook %s (ID: %s): %s",
+            event_type, event_id, e,
+            exc_info=True
+        )
+
+
 @stripe_router.post("/webhook")
 async def stripe_webhook(
     request: Request,
+    background_tasks: BackgroundTasks,
     stripe_signature: str = Header(..., alias="stripe-signature")
 ):
     """
@@ -73,14 +93,19 @@ async def stripe_webhook(
     - customer.subscription.updated: Configuration changes
     - customer.subscription.deleted: Subscription deleted
     - charge.dispute.created: Dispute created
+    
+    The raw event is recorded in stripe_events before answering, then
+    handled in a background task. Events whose handling never finishes
+    (worker restart, handler error) keep processed_at NULL and are re-driven
+    by run_stripe_event_redrive, so answering early cannot lose them.
     """
     # Get raw payload
     payload = await request.body()
-    logger.info(f"Received Stripe webhook request (payload size: {len(payload)} bytes)")
+    logger.info("Received Stripe webhook request (payload size: %d bytes)", len(payload))
 
     # Verify webhook signature
     try:
-        event = await verify_webhook_signature(payload, stripe_signature)
+        event = verify_webhook_signature(payload, stripe_signature)
     except HTTPException:
         raise
 
@@ -88,27 +113,20 @@ async def stripe_webhook(
     event_data = event["data"]["object"]
     event_id = event.get("id", "unknown")
 
-    logger.info(f"Processing Stripe webhook event: {event_type} (ID: {event_id})")
-    logger.debug(f"Full event data: {json.dumps(event, indent=2, default=str)}")
+    logger.info("Recording Stripe webhook event: %s (ID: %s)", event_type, event_id)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Full event data: %s", json.dumps(event, default=str))
     
     # Initialize webhook service
     org_repo = OrganizationRepository(supabase)
     stripe_event_repo = StripeEventRepository(supabase)
     webhook_service = BillingWebhookService(org_repo, stripe_event_repo)
     
-    try:
-        # Delegate to webhook service (pass event_id and raw_event)
-        await webhook_service.handle_webhook_event(event_type, event_data, event_id, event)
-        logger.info(f"Successfully processed webhook event {event_type} (ID: {event_id})")
-        return Response(status_code=200)
-
-    except Exception as e:
-        logger.error(
-            f"Error processing webhook {event_type} (ID: {event_id}): {e}",
-            exc_info=True
-        )
-        # Return 200 to prevent Stripe from retrying
-        return Response(status_code=200)
+    # Record before acknowledging: if this fails Stripe gets a 500 and retries
+    if await webhook_service.record_webhook_event(event_type, event_id, event):
+        background_tasks.add_task(process_webhook_event, event_type, event_data, event_id)
+    
+    return Response(status_code=200)
 
 
 # ============================================================================
@@ -158,7 +176,8 @@ async def upgrade_to_business(
     # Update Stripe subscription (validated to exist by validate_subscription_exists)
     assert org.stripe_subscription_id is not None
     assert org.stripe_subscription_item_id is not None
-    billing_service.modify_subscription(
+    await asyncio.to_thread(
+        billing_service.modify_subscription,
         subscription_id=org.stripe_subscription_id,
         subscription_item_id=org.stripe_subscription_item_id,
         price_id=price_id,
@@ -221,7 +240,8 @@ async def update_subscription_seats(
     # Update Stripe subscription quantity (validated to exist by validate_subscription_exists)
     assert org.stripe_subscription_id is not None
     assert org.stripe_subscription_item_id is not None
-    billing_service.modify_subscription(
+    await asyncio.to_thread(
+        billing_service.modify_subscription,
         subscription_id=org.stripe_subscription_id,
         subscription_item_id=org.stripe_subscription_item_id,
         quantity=req.seat_count
@@ -274,7 +294,8 @@ async def purchase_plan(
     )
     
     # Create Checkout Session
-    session = billing_service.create_checkout_session(
+    session = await asyncio.to_thread(
+        billing_service.create_checkout_session,
         customer_id=customer_id,
         price_id=price_id,
         quantity=quantity,
@@ -321,7 +342,8 @@ async def create_portal_session(
 
     # Create portal session (validated to exist by validate_customer_exists)
     assert org.stripe_customer_id is not None
-    portal_session = billing_service.create_portal_session(
+    portal_session = await asyncio.to_thread(
+        billing_service.create_portal_session,
         customer_id=org.stripe_customer_id,
         return_url=return_url
     )
@@ -10,6 +10,14 @@ from app.features.billing.models.organization import (
 )
 
 from app.infra.supabase.repositories.base import BaseRepository
+from app.utils.ttl_cache import TTLCache
+
+# Organization rows by id, for display-only reads (see find_by_id_cached).
+# Writes through this repository refresh the entry, but other workers keep
+# serving their copy for up to ORG_CACHE_TTL seconds, so billing fields
+# (plan, seats, active_member_count) must never be checked against it.
+ORG_CACHE_TTL = 60
+_org_cache: TTLCache[Organization] = TTLCache(maxsize=10_000, ttl=ORG_CACHE_TTL)
 
 
 class OrganizationRepository(BaseRepository[Organization, OrganizationCreate, OrganizationUpdate]):
@@ -18,6 +26,40 @@ class OrganizationRepository(BaseRepository[Organization, OrganizationCreate, Or
     def __init__(self, client: Client):
         super().__init__(client, "organizations", Organization)
     
+    async def find_by_id_cached(self, id: int) -> Optional[Organization]:
+        """
+        Find organization by ID, served from the in-process cache when fresh
+        
+        May be up to ORG_CACHE_TTL seconds stale. Only for reads that display
+        the row (e.g. its name); use find_by_id for anything that gates on
+        plan, seats or member counts.
+        """
+        cached = _org_cache.get(id)
+        if cached is not None:
+            return cached.model_copy()
+        
+        org = await self.find_by_id(id)
+        if org:
+            _org_cache.set(id, org.model_copy())
+        return org
+    
+    async def update(self, id: int, data: OrganizationUpdate) -> Optional[Organization]:
+        """Update organization and refresh its cache entry"""
+        _org_cache.invalidate(id)
+        org = await super().update(id, data)
+        if org:
+            _org_cache.set(id, org.model_copy())
+        return org
+    
+    def invalidate_cache(self, id: int) -> None:
+        """Drop the cached row after a write made outside this repository (e.g. an RPC)"""
+        _org_cache.invalidate(id)
+    
+    async def delete(self, id: int) -> bool:
+        """Delete organization and drop its cache entry"""
+        _org_cache.invalidate(id)
+        return await super().delete(id)
+    
     async def find_by_stripe_customer_id(self, stripe_customer_id: str) -> Optional[Organization]:
         """Find organization by Stripe customer ID"""
         results = await self.find_by_filters({"stripe_customer_id": stripe_customer_id}, limit=1)
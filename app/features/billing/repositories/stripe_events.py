@@ -1,5 +1,7 @@
 """Stripe events repository"""
-from typing import Optional
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional
 
 from supabase import Client  # type: ignore
 
@@ -19,13 +21,47 @@ class StripeEventRepository(BaseRepository[StripeEvent, StripeEventCreate, Strip
         results = await self.find_by_filters({"stripe_event_id": stripe_event_id}, limit=1)
         return results[0] if results else None
     
+    async def create_if_absent(self, data: StripeEventCreate) -> Optional[StripeEvent]:
+        """
+        Record a Stripe event unless one with the same Stripe event ID exists
+        
+        Returns the new record, or None if the event was already recorded
+        (a redelivery). Relies on the unique index on stripe_event_id.
+        """
+        data_dict = data.model_dump(exclude_unset=True, mode='json')
+        query = self._client.table(self._table_name) \
+            .upsert(data_dict, on_conflict="stripe_event_id", ignore_duplicates=True)
+        response = await asyncio.to_thread(query.execute)
+        
+        if not response.data:
+            return None
+        
+        return self._to_model(response.data[0])
+    
     async def mark_as_processed(self, stripe_event_id: str) -> Optional[StripeEvent]:
         """Mark a Stripe event as processed by updating processed_at timestamp"""
-        from datetime import datetime, timezone
+        update_data = StripeEventUpdate(processed_at=datetime.now(timezone.utc))
+        query = self._client.table(self._table_name) \
+            .update(update_data.model_dump(mode='json')) \
+            .eq("stripe_event_id", stripe_event_id)
+        response = await asyncio.to_thread(query.execute)
         
-        event = await self.find_by_stripe_event_id(stripe_event_id)
-        if not event:
+        if not response.data:
             return None
         
-        update_data = StripeEventUpdate(processed_at=datetime.now(timezone.utc))
-        return await self.update(event.id, update_data)
+        return self._to_model(response.data[0])
+    
+    async def claim_unprocessed(self, stale_after_seconds: int, limit: int) -> List[StripeEvent]:
+        """
+        Claim recorded but unprocessed events for another handling attempt
+        
+        Only events received more than stale_after_seconds ago (and not
+        claimed within that time) are returned, so in-flight handling is not
+        duplicated. Concurrent workers never claim the same row.
+        """
+        query = self._client.rpc(
+            'claim_stripe_events_for_redrive',
+            {'p_stale_after_seconds': stale_after_seconds, 'p_limit': limit}
+        )
+        response = await asyncio.to_thread(query.execute)
+        return self._to_models(response.data or [])
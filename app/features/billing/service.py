@@ -1,4 +1,5 @@
 """Billing service for subscription management operations"""
+import asyncio
 import logging
 from typing import Optional
 from dataclasses import dataclass
@@ -6,6 +7,7 @@ from enum import Enum
 import stripe
 from fastapi import HTTPException
 
+from app.config import STRIPE_PRICE_ID_PRO, STRIPE_PRICE_ID_BUSINESS
 from app.features.billing.repositories.organizations import OrganizationRepository
 from app.features.billing.models.organization import Organization, OrganizationUpdate
 
@@ -76,15 +78,15 @@ class BillingService:
         Raises:
             HTTPException(403): User is not a member
         """
-        result = self.supabase.table('organization_members') \
+        query = self.supabase.table('organization_members') \
             .select('role_id, status') \
             .eq('organization_id', organization_id) \
             .eq('user_id', user_id) \
             .eq('status', 'active') \
-            .single() \
-            .execute()
+            .maybe_single()
+        result = await asyncio.to_thread(query.execute)
         
-        if not result.data:
+        if result is None:
             logger.warning(f"User {user_id} not found in organization {organization_id}")
             raise HTTPException(
                 status_code=403,
@@ -250,7 +252,8 @@ class BillingService:
         
         try:
             logger.info(f"Creating Stripe customer for organization {org.id}")
-            customer = stripe.Customer.create(
+            customer = await asyncio.to_thread(
+                stripe.Customer.create,
                 metadata={
                     "organization_id": str(org.id),
                     "user_id": user_id
@@ -412,8 +415,6 @@ class BillingService:
             HTTPException(400): Invalid plan type
             HTTPException(500): Price ID not configured
         """
-        from app.config import STRIPE_PRICE_ID_PRO, STRIPE_PRICE_ID_BUSINESS
-        
         if plan_type == "pro":
             price_id = STRIPE_PRICE_ID_PRO
         elif plan_type == "business":
@@ -1,15 +1,38 @@
 """Organization service for member and invitation management"""
+import asyncio
+import base64
+import json
 import logging
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
-import uuid
+import re
+import secrets
+from datetime import datetime
+from typing import List, Optional, Dict, Tuple
 from fastapi import HTTPException
 
 from app.features.billing.repositories.organizations import OrganizationRepository
 from app.features.billing.models.organization import Organization, OrganizationUpdate
+from app.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# organization_member_roles is effectively static; cache the whole table
+ROLES_CACHE_TTL = 300
+_roles_cache: TTLCache[Dict[int, Dict]] = TTLCache(maxsize=1, ttl=ROLES_CACHE_TTL)
+
+# Random bytes per invitation token (urlsafe-base64 encoded into the link).
+# 16 bytes = 128 bits, i.e. a 22-character token, at least uuid4's 122 bits.
+INVITATION_TOKEN_BYTES = 16
+
+# Invitation columns the API reads (excludes token_hash)
+INVITATION_COLUMNS = (
+    'id, organization_id, inviter_id, invitee_email, invitee_id, token, '
+    'role_id, status, expires_at, created_at, accepted_at'
+)
+
+# Invitation ids are embedded in a PostgREST filter when decoding a page
+# cursor; anything outside this set is rejected rather than escaped
+_INVITATION_ID_RE = re.compile(r'[0-9A-Za-z-]+')
+
 
 class OrganizationService:
     """Service for organization member and invitation management operations"""
@@ -22,13 +45,25 @@ class OrganizationService:
     # AUTHORIZATION & ACCESS CONTROL
     # ============================================================================
     
-    async def get_organization_or_404(self, organization_id: int) -> Organization:
+    async def get_organization_or_404(
+        self,
+        organization_id: int,
+        allow_stale: bool = False
+    ) -> Organization:
         """
         Get organization by ID or raise 404
         
         Single responsibility: Organization retrieval with error handling
+        
+        Args:
+            organization_id: Organization ID
+            allow_stale: Serve from the in-process cache, which may lag other
+                         workers' writes; only for display (e.g. the name)
         """
-        org = await self.org_repo.find_by_id(organization_id)
+        if allow_stale:
+            org = await self.org_repo.find_by_id_cached(organization_id)
+        else:
+            org = await self.org_repo.find_by_id(organization_id)
         if not org:
             logger.error(f"Organization not found: {organization_id}")
             raise HTTPException(status_code=404, detail="Organization not found")
@@ -38,45 +73,40 @@ class OrganizationService:
         self,
         organization_id: int,
         user_id: str
-    ) -> Dict:
+    ) -> None:
         """
         Verify user is owner or admin of organization
         
         Single responsibility: Owner/Admin authorization
         
-        Returns:
-            Member record
+        Uses the is_org_admin RPC, which returns NULL for non-members and
+        false for members without an owner/admin role.
             
         Raises:
             HTTPException(403): User is not a member or not owner/admin
         """
-        result = self.supabase.table('organization_members') \
-            .select('*') \
-            .eq('organization_id', organization_id) \
-            .eq('user_id', user_id) \
-            .eq('status', 'active') \
-            .single() \
-            .execute()
+        query = self.supabase.rpc(
+            'is_org_admin',
+            {'p_org': organization_id, 'p_user': user_id}
+        )
         
-        if not result.data:
+        result = await asyncio.to_thread(query.execute)
+        
+        if result.data is None:
             logger.warning(f"User {user_id} not found in organization {organization_id}")
             raise HTTPException(
                 status_code=403,
                 detail="You are not a member of this organization"
             )
         
-        role_id = result.data.get('role_id')
-        if role_id not in [1, 2]:  # owner or admin
+        if not result.data:
             logger.warning(
-                f"User {user_id} is not owner/admin of organization {organization_id} "
-                f"(role_id={role_id})"
+                f"User {user_id} is not owner/admin of organization {organization_id}"
             )
             raise HTTPException(
                 status_code=403,
                 detail="Only organization owners/admins can perform this action"
             )
-        
-        return result.data
     
     # ============================================================================
     # MEMBER OPERATIONS
@@ -96,14 +126,14 @@ class OrganizationService:
             HTTPException(404): Member not found
         """
         result = self.supabase.table('organization_members') \
-            .select('*') \
+            .select('id, organization_id, user_id, role_id, status') \
             .eq('id', member_id) \
             .eq('organization_id', organization_id) \
             .eq('status', 'active') \
-            .single() \
+            .maybe_single() \
             .execute()
         
-        if not result.data:
+        if result is None:
             raise HTTPException(
                 status_code=404,
                 detail="Member not found"
@@ -116,12 +146,18 @@ class OrganizationService:
         organization_id: int
     ) -> List[Dict]:
         """
-        Get all active members of an organization
+        Get all active members of an organization with user data
         
         Single responsibility: Fetch all active members
+        
+        Rows come from the organization_members_enriched view and already
+        include email, profile name, avatar and role name.
         """
-        result = self.supabase.table('organization_members') \
-            .select('*') \
+        result = self.supabase.table('organization_members_enriched') \
+            .select(
+                'id, user_id, organization_id, role_id, status, created_at, '
+                'email, name, avatar_url, role_name'
+            ) \
             .eq('organization_id', organization_id) \
             .eq('status', 'active') \
             .execute()
@@ -161,45 +197,43 @@ class OrganizationService:
         
         logger.info(f"Deactivated member {member_id}")
     
-    async def increment_active_member_count(
+    async def decrement_active_member_count(
         self,
         org: Organization
     ) -> Organization:
         """
-        Increment organization's active member count by 1
+        Decrement organization's active member count by 1
         
-        Single responsibility: Member count increment
+        Single responsibility: Member count decrement
         """
-        current_count = org.active_member_count or 0
-        new_count = current_count + 1
-        
-        updated_org = await self.org_repo.update(
-            org.id,
-            OrganizationUpdate(active_member_count=new_count)
-        )
-        
-        logger.info(f"Incremented active_member_count for org {org.id}: {current_count} → {new_count}")
-        return updated_org
+        return await self.adjust_active_member_count(org, -1)
     
-    async def decrement_active_member_count(
+    async def adjust_active_member_count(
         self,
-        org: Organization
+        org: Organization,
+        delta: int
     ) -> Organization:
         """
-        Decrement organization's active member count by 1
+        Atomically add delta to organization's active member count
         
-        Single responsibility: Member count decrement
-        """
-        current_count = org.active_member_count or 0
-        new_count = max(current_count - 1, 0)
+        Single responsibility: Member count update (adjust_active_member_count RPC)
+        
+        The count is changed in a single UPDATE, so concurrent joins and
+        removals cannot overwrite each other. It never goes below zero.
         
-        updated_org = await self.org_repo.update(
-            org.id,
-            OrganizationUpdate(active_member_count=new_count)
+        Returns:
+            Organization with the new active_member_count
+        """
+        query = self.supabase.rpc(
+            'adjust_active_member_count',
+            {'p_org': org.id, 'p_delta': delta}
         )
+        result = await asyncio.to_thread(query.execute)
+        self.org_repo.invalidate_cache(org.id)
         
-        logger.info(f"Decremented active_member_count for org {org.id}: {current_count} → {new_count}")
-        return updated_org
+        new_count = result.data if result.data is not None else org.active_member_count
+        logger.info(f"Adjusted active_member_count for org {org.id} by {delta}: now {new_count}")
+        return org.model_copy(update={'active_member_count': new_count})
     
     async def deactivate_non_owner_members(
         self,
@@ -219,37 +253,36 @@ class OrganizationService:
         Returns:
             Number of members deactivated
         """
-        print(f"   🚫 Deactivating all non-owner members for organization {organization_id}...")
-        
         # Get all active non-owner members
-        result = self.supabase.table('organization_members') \
+        query = self.supabase.table('organization_members') \
             .select('id, user_id, role_id') \
             .eq('organization_id', organization_id) \
             .eq('status', 'active') \
-            .neq('role_id', 1) \
-            .execute()
+            .neq('role_id', 1)
+        result = await asyncio.to_thread(query.execute)
         
         members_to_deactivate = result.data or []
         count = len(members_to_deactivate)
         
         if count == 0:
-            print(f"   ℹ️  No non-owner members to deactivate")
             logger.info(f"No non-owner members to deactivate for organization {organization_id}")
             return 0
         
-        print(f"   📋 Found {count} non-owner member(s) to deactivate:")
-        for member in members_to_deactivate:
-            print(f"      - Member ID: {member['id']}, User ID: {member['user_id']}, Role ID: {member['role_id']}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for member in members_to_deactivate:
+                logger.debug(
+                    "Deactivating member %s (user %s, role %s) in organization %s",
+                    member['id'], member['user_id'], member['role_id'], organization_id
+                )
         
         # Deactivate all non-owner members
-        self.supabase.table('organization_members') \
+        query = self.supabase.table('organization_members') \
             .update({"status": "inactive"}) \
             .eq('organization_id', organization_id) \
             .eq('status', 'active') \
-            .neq('role_id', 1) \
-            .execute()
+            .neq('role_id', 1)
+        await asyncio.to_thread(query.execute)
         
-        print(f"   ✅ Deactivated {count} non-owner member(s)")
         logger.info(f"Deactivated {count} non-owner members for organization {organization_id}")
         
         # Update active_member_count to 1 (only owner remains)
@@ -259,7 +292,6 @@ class OrganizationService:
                 organization_id,
                 OrganizationUpdate(active_member_count=1)
             )
-            print(f"   ✅ Updated active_member_count to 1")
             logger.info(f"Updated active_member_count to 1 for organization {organization_id}")
         
         return count
@@ -268,80 +300,24 @@ class OrganizationService:
     # DATA ENRICHMENT
     # ============================================================================
     
-    async def get_user_profiles_map(
-        self,
-        user_ids: List[str]
-    ) -> Dict[str, Dict]:
-        """
-        Get user profiles for multiple users
-        
-        Single responsibility: Batch profile fetching
-        
-        Returns:
-            Dict mapping user_id -> profile data
-        """
-        if not user_ids:
-            return {}
-        
-        result = self.supabase.table('user_profiles') \
-            .select('*') \
-            .in_('id', user_ids) \
-            .execute()
-        
-        profiles = result.data or []
-        return {p['id']: p for p in profiles}
-    
-    async def get_user_emails_map(
-        self,
-        user_ids: Optional[List[str]] = None
-    ) -> Dict[str, str]:
+    def get_all_roles(self) -> Dict[int, Dict]:
         """
-        Get user emails from auth.users
+        Get every organization member role, keyed by ID
         
-        Single responsibility: Batch email fetching
+        Single responsibility: Role table lookup (cached)
         
-        Returns:
-            Dict mapping user_id -> email
+        organization_member_roles holds a handful of rows that practically
+        never change, so the whole table is cached for ROLES_CACHE_TTL seconds.
         """
-        all_users = self.supabase.auth.admin.list_users()
-        
-        if user_ids:
-            # Filter to only requested user IDs
-            return {
-                user.id: user.email 
-                for user in all_users 
-                if user.id in user_ids and user.email
-            }
-        else:
-            # Return all
-            return {
-                user.id: user.email 
-                for user in all_users 
-                if user.email
-            }
-    
-    async def get_roles_map(
-        self,
-        role_ids: List[int]
-    ) -> Dict[int, Dict]:
-        """
-        Get role information for multiple role IDs
-        
-        Single responsibility: Batch role fetching
-        
-        Returns:
-            Dict mapping role_id -> role data
-        """
-        if not role_ids:
-            return {}
-        
-        result = self.supabase.table('organization_member_roles') \
-            .select('*') \
-            .in_('id', role_ids) \
-            .execute()
+        roles = _roles_cache.get('all')
+        if roles is None:
+            result = self.supabase.table('organization_member_roles') \
+                .select('id, name') \
+                .execute()
+            roles = {r['id']: r for r in result.data or []}
+            _roles_cache.set('all', roles)
         
-        roles = result.data or []
-        return {r['id']: r for r in roles}
+        return roles
     
     def get_role_by_id(self, role_id: int) -> Optional[Dict]:
         """
@@ -349,94 +325,12 @@ class OrganizationService:
         
         Single responsibility: Single role lookup
         """
-        result = self.supabase.table('organization_member_roles') \
-            .select('*') \
-            .eq('id', role_id) \
-            .single() \
-            .execute()
-        
-        return result.data if result.data else None
-    
-    async def enrich_members_with_user_data(
-        self,
-        members: List[Dict]
-    ) -> List[Dict]:
-        """
-        Enrich member data with profiles, emails, and roles
-        
-        Single responsibility: Complete member data enrichment
-        
-        Combines member data with:
-        - User profiles (name, avatar)
-        - User emails (from auth.users)
-        - Role names
-        """
-        if not members:
-            return []
-        
-        # Get unique IDs
-        user_ids = list(set([m['user_id'] for m in members]))
-        role_ids = list(set([m['role_id'] for m in members if m.get('role_id')]))
-        
-        # Fetch all data in parallel
-        profiles_map = await self.get_user_profiles_map(user_ids)
-        emails_map = await self.get_user_emails_map(user_ids)
-        roles_map = await self.get_roles_map(role_ids)
-        
-        # Enrich each member
-        enriched = []
-        for member in members:
-            user_id = member['user_id']
-            role_id = member.get('role_id')
-            
-            profile = profiles_map.get(user_id, {})
-            email = emails_map.get(user_id, 'unknown@example.com')
-            role = roles_map.get(role_id) if role_id else None
-            
-            enriched.append({
-                **member,
-                'email': email,
-                'name': profile.get('name'),
-                'avatar_url': profile.get('avatar_url'),
-                'role_name': role['name'] if role else None
-            })
-        
-        return enriched
+        return self.get_all_roles().get(role_id)
     
     # ============================================================================
     # INVITATION OPERATIONS
     # ============================================================================
     
-    def get_invitation_by_token(
-        self,
-        token: str,
-        status: Optional[str] = None
-    ) -> Dict:
-        """
-        Get invitation by token
-        
-        Single responsibility: Invitation lookup
-        
-        Raises:
-            HTTPException(404): Invitation not found
-        """
-        query = self.supabase.table('organization_invitations') \
-            .select('*') \
-            .eq('token', token)
-        
-        if status:
-            query = query.eq('status', status)
-        
-        result = query.single().execute()
-        
-        if not result.data:
-            raise HTTPException(
-                status_code=404,
-                detail="Invitation not found or already used"
-            )
-        
-        return result.data
-    
     def get_invitation_by_id(self, invitation_id: str) -> Dict:
         """
         Get invitation by ID
@@ -447,12 +341,12 @@ class OrganizationService:
             HTTPException(404): Invitation not found
         """
         result = self.supabase.table('organization_invitations') \
-            .select('*') \
+            .select(INVITATION_COLUMNS) \
             .eq('id', invitation_id) \
-            .single() \
+            .maybe_single() \
             .execute()
         
-        if not result.data:
+        if result is None:
             raise HTTPException(
                 status_code=404,
                 detail="Invitation not found"
@@ -460,58 +354,60 @@ class OrganizationService:
         
         return result.data
     
-    def check_invitation_expiry(
+    def accept_invitation(
         self,
-        invitation: Dict
-    ) -> bool:
+        token: str,
+        user_id: str
+    ) -> Dict:
         """
-        Check if invitation has expired
+        Accept an invitation atomically
         
-        Single responsibility: Expiry validation
+        Single responsibility: Invitation acceptance (accept_organization_invitation RPC)
+        
+        Validates the token, checks membership and seats, inserts the member,
+        marks the invitation accepted and increments active_member_count in one
+        transaction with the organization row locked.
         
         Returns:
-            True if expired, False otherwise
-        """
-        expires_at = datetime.fromisoformat(invitation['expires_at'].replace('Z', '+00:00'))
-        now = datetime.now(expires_at.tzinfo)
-        return now > expires_at
-    
-    def mark_invitation_expired(
-        self,
-        invitation_id: str
-    ) -> None:
+            Dict with status, organization_id, organization_name and seat_count
+            
+        Raises:
+            HTTPException(404): Invitation or organization not found
+            HTTPException(400): Invitation expired or no seats available
         """
-        Mark invitation as expired
+        result = self.supabase.rpc(
+            'accept_organization_invitation',
+            {'p_token': token, 'p_user': user_id}
+        ).execute()
         
-        Single responsibility: Status update to expired
-        """
-        self.supabase.table('organization_invitations') \
-            .update({"status": "expired"}) \
-            .eq('id', invitation_id) \
-            .execute()
+        outcome = result.data[0] if result.data else {'status': 'not_found'}
+        status = outcome['status']
         
-        logger.info(f"Marked invitation {invitation_id} as expired")
-    
-    def mark_invitation_accepted(
-        self,
-        invitation_id: str,
-        user_id: str
-    ) -> None:
-        """
-        Mark invitation as accepted
+        if status == 'not_found':
+            raise HTTPException(
+                status_code=404,
+                detail="Invitation not found or already used"
+            )
         
-        Single responsibility: Status update to accepted
-        """
-        self.supabase.table('organization_invitations') \
-            .update({
-                "status": "accepted",
-                "accepted_at": datetime.utcnow().isoformat(),
-                "invitee_id": user_id
-            }) \
-            .eq('id', invitation_id) \
-            .execute()
+        if status == 'expired':
+            raise HTTPException(status_code=400, detail="Invitation has expired")
+        
+        if status == 'organization_not_found':
+            logger.error(f"Organization not found: {outcome['organization_id']}")
+            raise HTTPException(status_code=404, detail="Organization not found")
+        
+        if status == 'no_seats':
+            raise HTTPException(
+                status_code=400,
+                detail=f"Organization has reached its seat limit ({outcome['seat_count']} seats). "
+                       f"Please contact your organization admin to add more seats."
+            )
         
-        logger.info(f"Marked invitation {invitation_id} as accepted by {user_id}")
+        if status == 'accepted':
+            self.org_repo.invalidate_cache(outcome['organization_id'])
+            logger.info(f"User {user_id} joined organization {outcome['organization_id']}")
+        
+        return outcome
     
     def mark_invitation_cancelled(
         self,
@@ -538,41 +434,95 @@ class OrganizationService:
         expires_in_days: int = 7
     ) -> Dict:
         """
-        Create a new organization invitation
+        Create a new organization invitation atomically
+        
+        Single responsibility: Invitation creation (create_organization_invitation RPC)
+        
+        Checks the inviter's role, the Business plan, existing membership,
+        seats and pending invitations, then inserts the invitation in one
+        transaction with the organization row locked. Only one pending
+        invitation may exist per (organization, email).
         
-        Single responsibility: Invitation creation
+        invitee_email is expected lower-cased (the request model normalizes it).
         
         Returns:
-            Created invitation record
-        """
-        token = str(uuid.uuid4())
-        expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
-        
-        invitation_data = {
-            "organization_id": organization_id,
-            "inviter_id": inviter_id,
-            "invitee_email": invitee_email.lower(),
-            "invitee_id": None,
-            "token": token,
-            "role_id": role_id,
-            "status": "pending",
-            "expires_at": expires_at.isoformat(),
-        }
+            Dict with the created invitation plus organization_name,
+            role_name and inviter_name
+            
+        Raises:
+            HTTPException(404): Organization not found
+            HTTPException(403): Inviter is not a member or not owner/admin
+            HTTPException(400): Not on Business plan, already a member,
+                                not enough seats, or a valid pending
+                                invitation already exists
+        """
+        result = self.supabase.rpc(
+            'create_organization_invitation',
+            {
+                'p_org': organization_id,
+                'p_inviter': inviter_id,
+                'p_email': invitee_email,
+                'p_role_id': role_id,
+                'p_token': self.generate_invitation_token(),
+                'p_expires_in_days': expires_in_days,
+            }
+        ).execute()
         
-        result = self.supabase.table('organization_invitations') \
-            .insert(invitation_data) \
-            .execute()
+        outcome = result.data or {'status': 'organization_not_found'}
+        status = outcome['status']
         
-        if not result.data:
+        if status == 'organization_not_found':
+            logger.error(f"Organization not found: {organization_id}")
+            raise HTTPException(status_code=404, detail="Organization not found")
+        
+        if status == 'not_member':
+            logger.warning(f"User {inviter_id} not found in organization {organization_id}")
+            raise HTTPException(
+                status_code=403,
+                detail="You are not a member of this organization"
+            )
+        
+        if status == 'not_admin':
+            logger.warning(
+                f"User {inviter_id} is not owner/admin of organization {organization_id}"
+            )
+            raise HTTPException(
+                status_code=403,
+                detail="Only organization owners/admins can perform this action"
+            )
+        
+        if status == 'plan_not_business':
+            raise HTTPException(
+                status_code=400,
+                detail=f"Organization invitations are only available for Business plans. "
+                       f"Current plan: {outcome['plan_type']}. "
+                       f"Please upgrade to Business to invite team members."
+            )
+        
+        if status == 'already_member':
+            raise HTTPException(
+                status_code=400,
+                detail="User is already a member of this organization"
+            )
+        
+        if status == 'no_seats':
+            seats_needed = outcome['required'] - outcome['seats']
+            raise HTTPException(
+                status_code=400,
+                detail=f"Not enough seats available. You need {seats_needed} more seat(s). "
+                       f"Current seats: {outcome['seats']}, Required: {outcome['required']}"
+            )
+        
+        if status == 'pending_exists':
             raise HTTPException(
-                status_code=500,
-                detail="Failed to create invitation"
+                status_code=400,
+                detail="A pending invitation already exists for this email"
             )
         
-        invitation = result.data[0]
+        invitation = outcome['invitation']
         logger.info(f"Created invitation {invitation['id']} for {invitee_email}")
         
-        return invitation
+        return outcome
     
     def get_pending_invitations_count(
         self,
@@ -584,64 +534,54 @@ class OrganizationService:
         Single responsibility: Pending count query
         """
         result = self.supabase.table('organization_invitations') \
-            .select('id', count='exact') \
+            .select('id', count='exact', head=True) \
             .eq('organization_id', organization_id) \
             .eq('status', 'pending') \
             .execute()
         
         return result.count or 0
     
-    def get_all_invitations(
-        self,
-        organization_id: int
-    ) -> List[Dict]:
-        """
-        Get all invitations for an organization
-        
-        Single responsibility: Fetch all invitations
-        """
-        result = self.supabase.table('organization_invitations') \
-            .select('*') \
-            .eq('organization_id', organization_id) \
-            .order('created_at', desc=True) \
-            .execute()
-        
-        return result.data or []
-    
-    def check_existing_pending_invitation(
+    def get_invitations_page(
         self,
         organization_id: int,
-        invitee_email: str
-    ) -> Optional[Dict]:
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict]:
         """
-        Check for existing valid pending invitation
+        Get a page of invitations for an organization, newest first
         
-        Single responsibility: Duplicate invitation check
+        Single responsibility: Fetch one page of invitations
         
+        Args:
+            organization_id: Organization ID
+            limit: Maximum number of invitations to return
+            after: (created_at, id) of the last invitation of the previous
+                   page, as returned by decode_invitations_cursor
+            
         Returns:
-            Pending invitation if exists and not expired, None otherwise
-        """
-        result = self.supabase.table('organization_invitations') \
-            .select('*') \
-            .eq('organization_id', organization_id) \
-            .eq('invitee_email', invitee_email.lower()) \
-            .eq('status', 'pending') \
-            .execute()
-        
-        if not result.data:
-            return None
-        
-        # Check if any pending invitation is still valid (not expired)
-        now = datetime.utcnow()
+            Up to limit + 1 invitations, including role_name and
+            inviter_name; the extra row signals another page
+        """
+        query = self.supabase.table('organization_invitations_enriched') \
+            .select(f"{INVITATION_COLUMNS}, role_name, inviter_name") \
+            .eq('organization_id', organization_id)
+        
+        if after:
+            # Keyset on (created_at, id) so invitations sharing a created_at
+            # are not skipped at a page boundary
+            created_at, invitation_id = after[0].isoformat(), after[1]
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{invitation_id}")'
+            )
         
-        for invite in result.data:
-            expires_at = datetime.fromisoformat(invite['expires_at'].replace('Z', '+00:00'))
-            if expires_at > now.replace(tzinfo=expires_at.tzinfo):
-                # Found a valid pending invitation
-                return invite
+        result = query \
+            .order('created_at', desc=True) \
+            .order('id', desc=True) \
+            .limit(limit + 1) \
+            .execute()
         
-        # All pending invitations are expired
-        return None
+        return result.data or []
     
     # ============================================================================
     # VALIDATION
@@ -703,133 +643,6 @@ class OrganizationService:
                 detail="Cannot assign owner role to members"
             )
     
-    async def validate_user_not_member(
-        self,
-        organization_id: int,
-        user_email: str
-    ) -> None:
-        """
-        Validate user is not already a member
-        
-        Single responsibility: Duplicate member check
-        
-        Raises:
-            HTTPException(400): User is already a member
-        """
-        # Get all active members
-        members_result = self.supabase.table('organization_members') \
-            .select('id, user_id') \
-            .eq('organization_id', organization_id) \
-            .eq('status', 'active') \
-            .execute()
-        
-        if not members_result.data:
-            return  # No members, email is not a member
-        
-        # Get user IDs
-        user_ids = [m['user_id'] for m in members_result.data]
-        
-        # Fetch emails for these users
-        emails_map = await self.get_user_emails_map(user_ids)
-        member_emails = [email.lower() for email in emails_map.values()]
-        
-        # Check if invited email is already a member
-        if user_email.lower() in member_emails:
-            raise HTTPException(
-                status_code=400,
-                detail="User is already a member of this organization"
-            )
-    
-    def validate_business_plan_for_invitations(
-        self,
-        org: Organization
-    ) -> None:
-        """
-        Validate organization is on Business plan (required for invitations)
-        
-        Single responsibility: Plan type validation for invitations
-        
-        Raises:
-            HTTPException(400): Not on Business plan
-        """
-        if org.plan_type != "business":
-            raise HTTPException(
-                status_code=400,
-                detail=f"Organization invitations are only available for Business plans. "
-                       f"Current plan: {org.plan_type}. "
-                       f"Please upgrade to Business to invite team members."
-            )
-    
-    def validate_seats_available_for_invitation(
-        self,
-        org: Organization,
-        pending_invitations_count: Optional[int] = None
-    ) -> None:
-        """
-        Validate organization has seats available for new invitation
-        
-        Single responsibility: Seat availability validation
-        
-        Args:
-            org: Organization
-            pending_invitations_count: Optional count of pending invitations
-                                       (will query if not provided)
-        
-        Raises:
-            HTTPException(400): Not enough seats
-        """
-        if not org.stripe_subscription_id:
-            return  # No subscription, no seat limit
-        
-        current_member_count = org.active_member_count or 0
-        
-        # Get pending invitations count if not provided
-        if pending_invitations_count is None:
-            pending_invitations_count = self.get_pending_invitations_count(org.id)
-        
-        # Calculate projected member count
-        projected_member_count = current_member_count + pending_invitations_count + 1
-        current_seat_count = org.seat_count or 1
-        
-        logger.info(
-            f"Seat check for org {org.id}: "
-            f"current={current_member_count}, pending={pending_invitations_count}, "
-            f"projected={projected_member_count}, seats={current_seat_count}"
-        )
-        
-        if projected_member_count > current_seat_count:
-            seats_needed = projected_member_count - current_seat_count
-            raise HTTPException(
-                status_code=400,
-                detail=f"Not enough seats available. You need {seats_needed} more seat(s). "
-                       f"Current seats: {current_seat_count}, Required: {projected_member_count}"
-            )
-    
-    def validate_seats_available_for_acceptance(
-        self,
-        org: Organization
-    ) -> None:
-        """
-        Validate organization has seats available for accepting invitation
-        
-        Single responsibility: Seat availability for acceptance
-        
-        Raises:
-            HTTPException(400): No seats available
-        """
-        if org.plan_type != "business" or not org.stripe_subscription_id:
-            return  # No seat limit for non-Business plans
-        
-        current_member_count = org.active_member_count or 0
-        current_seat_count = org.seat_count or 1
-        
-        if current_member_count >= current_seat_count:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Organization has reached its seat limit ({current_seat_count} seats). "
-                       f"Please contact your organization admin to add more seats."
-            )
-    
     def validate_invitation_status(
         self,
         invitation: Dict,
@@ -849,104 +662,17 @@ class OrganizationService:
                 detail=f"Invitation must be {expected_status} to perform this action"
             )
     
-    # ============================================================================
-    # MEMBER ADDITION
-    # ============================================================================
-    
-    async def add_member_to_organization(
-        self,
-        organization_id: int,
-        user_id: str,
-        role_id: Optional[int] = None
-    ) -> Dict:
-        """
-        Add a user as a member of an organization
-        
-        Single responsibility: Member creation
-        
-        Args:
-            organization_id: Organization ID
-            user_id: User ID to add
-            role_id: Role ID (defaults to 'member' role if None)
-            
-        Returns:
-            Created member record
-        """
-        # Get role_id if not provided
-        if role_id is None:
-            role_id = self.get_default_member_role_id()
-        
-        member_data = {
-            "organization_id": organization_id,
-            "user_id": user_id,
-            "role_id": role_id,
-            "status": "active"
-        }
-        
-        result = self.supabase.table('organization_members') \
-            .insert(member_data) \
-            .execute()
-        
-        if not result.data:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to add member to organization"
-            )
-        
-        member = result.data[0]
-        logger.info(f"Added user {user_id} to organization {organization_id}")
-        
-        return member
-    
-    def check_user_is_member(
-        self,
-        organization_id: int,
-        user_id: str
-    ) -> bool:
-        """
-        Check if user is an active member of organization
-        
-        Single responsibility: Membership check
-        
-        Returns:
-            True if user is active member, False otherwise
-        """
-        result = self.supabase.table('organization_members') \
-            .select('id') \
-            .eq('organization_id', organization_id) \
-            .eq('user_id', user_id) \
-            .eq('status', 'active') \
-            .execute()
-        
-        return bool(result.data)
-    
     # ============================================================================
     # HELPER METHODS
     # ============================================================================
     
-    def get_default_member_role_id(self) -> int:
+    def generate_invitation_token(self) -> str:
         """
-        Get the default 'member' role ID
-        
-        Single responsibility: Default role lookup
+        Generate a new URL-safe invitation token
         
-        Returns:
-            Role ID for 'member' role (fallback to 3)
+        Single responsibility: Token generation
         """
-        try:
-            result = self.supabase.table('organization_member_roles') \
-                .select('id') \
-                .eq('name', 'member') \
-                .single() \
-                .execute()
-            
-            if result.data:
-                return result.data['id']
-        except Exception as e:
-            logger.warning(f"Failed to fetch default member role: {e}")
-        
-        # Fallback to 3
-        return 3
+        return secrets.token_urlsafe(INVITATION_TOKEN_BYTES)
     
     def generate_invitation_link(
         self,
@@ -960,23 +686,34 @@ class OrganizationService:
         """
         return f"{frontend_url}/invite/org/{token}"
     
-    async def get_inviter_name(self, user_id: str) -> Optional[str]:
+    def encode_invitations_cursor(self, invitation: Dict) -> str:
         """
-        Get user's name from profile
+        Build the opaque next-page cursor for the invitations list
         
-        Single responsibility: Inviter name lookup
+        Single responsibility: Cursor encoding
         """
-        try:
-            result = self.supabase.table('user_profiles') \
-                .select('name') \
-                .eq('id', user_id) \
-                .single() \
-                .execute()
-            
-            if result.data:
-                return result.data.get('name')
-        except Exception:
-            pass
+        key = json.dumps([invitation['created_at'], str(invitation['id'])])
+        return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+    
+    def decode_invitations_cursor(self, cursor: str) -> Tuple[datetime, str]:
+        """
+        Parse a cursor from encode_invitations_cursor
         
-        return None
-
+        Single responsibility: Cursor decoding and validation
+        
+        Returns:
+            (created_at, id) of the last invitation of the previous page
+            
+        Raises:
+            HTTPException(400): Cursor is malformed
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, invitation_id = json.loads(base64.urlsafe_b64decode(padded))
+            if not isinstance(created_at, str) or not isinstance(invitation_id, str):
+                raise ValueError("cursor fields must be strings")
+            if not _INVITATION_ID_RE.fullmatch(invitation_id):
+                raise ValueError("unexpected characters in invitation id")
+            return datetime.fromisoformat(created_at), invitation_id
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import datetime, timezone
 import stripe
@@ -14,6 +15,13 @@ logger = logging.getLogger(__name__)
 # Initialize Stripe
 stripe.api_key = STRIPE_SECRET_KEY
 
+# Unprocessed stripe_events rows are re-driven every STRIPE_EVENT_REDRIVE_INTERVAL
+# seconds once they are STRIPE_EVENT_REDRIVE_STALE_AFTER seconds old, which is
+# well past the time a normal background handling run takes
+STRIPE_EVENT_REDRIVE_INTERVAL = 60
+STRIPE_EVENT_REDRIVE_STALE_AFTER = 300
+STRIPE_EVENT_REDRIVE_BATCH = 50
+
 
 class BillingWebhookService:
     
@@ -32,48 +40,63 @@ class BillingWebhookService:
         elif price_id == STRIPE_PRICE_ID_BUSINESS:
             return SubscriptionPlanType.BUSINESS
         else:
-            logger.error(f"BillingWebhookService: Unknown price_id {price_id}, defaulting to FREE (unknown price should not grant access)")
+            logger.error("BillingWebhookService: Unknown price_id %s, defaulting to FREE (unknown price should not grant access)", price_id)
             return SubscriptionPlanType.FREE
     
-    async def _persist_raw_event(self, event_id: str, event_type: str, raw_event: dict) -> None:
+    async def _persist_raw_event(self, event_id: str, event_type: str, raw_event: dict) -> bool:
         try:
             create_data = StripeEventCreate(
                 stripe_event_id=event_id,
                 type=event_type,
                 payload=raw_event
             )
-            await self.stripe_event_repo.create(create_data)
-            logger.debug(f"BillingWebhookService: Persisted event {event_id} of type {event_type}")
+            created = await self.stripe_event_repo.create_if_absent(create_data)
         except Exception:
             logger.error("BillingWebhookService: Failed to persist Stripe event — aborting", exc_info=True)
             raise
+        
+        if created is None:
+            logger.debug("BillingWebhookService: Event %s already stored (redelivery)", event_id)
+            return False
+        
+        logger.debug("BillingWebhookService: Persisted event %s of type %s", event_id, event_type)
+        return True
     
     async def _check_idempotency(self, event_id: str) -> bool:
         existing_event = await self.stripe_event_repo.find_by_stripe_event_id(event_id)
         if existing_event and existing_event.processed_at:
-            logger.info(f"BillingWebhookService: Event {event_id} already processed at {existing_event.processed_at}, skipping")
+            logger.info("BillingWebhookService: Event %s already processed at %s, skipping", event_id, existing_event.processed_at)
             return True
         return False
     
     async def _mark_event_processed(self, event_id: str) -> None:
         try:
             await self.stripe_event_repo.mark_as_processed(event_id)
-            logger.debug(f"BillingWebhookService: Marked event {event_id} as processed")
+            logger.debug("BillingWebhookService: Marked event %s as processed", event_id)
         except Exception:
-            logger.error(f"BillingWebhookService: Failed to mark event {event_id} as processed", exc_info=True)
+            logger.error("BillingWebhookService: Failed to mark event %s as processed", event_id, exc_info=True)
             # Don't raise - if marking as processed fails, we still want to continue
             # The event was already handled successfully at this point
     
-    async def handle_webhook_event(self, event_type: str, event_data: dict, event_id: str, raw_event: dict) -> None:
-        logger.debug(f"BillingWebhookService: Handling webhook event {event_type} (ID: {event_id})")
+    async def record_webhook_event(self, event_type: str, event_id: str, raw_event: dict) -> bool:
+        """
+        Persist the raw event and report whether it still needs handling
         
+        Returns False for a redelivery of an event that was already processed.
+        """
         # Global Rule 2: Persist raw event first
-        await self._persist_raw_event(event_id, event_type, raw_event)
+        is_new = await self._persist_raw_event(event_id, event_type, raw_event)
         
-        # Global Rule 3: Ensure idempotency
-        if await self._check_idempotency(event_id):
-            logger.debug(f"BillingWebhookService: Event {event_id} already processed, skipping")
-            return
+        # Global Rule 3: Ensure idempotency. A redelivered event is only
+        # handled again if its earlier delivery never finished processing.
+        if not is_new and await self._check_idempotency(event_id):
+            logger.debug("BillingWebhookService: Event %s already processed, skipping", event_id)
+            return False
+        
+        return True
+    
+    async def process_webhook_event(self, event_type: str, event_data: dict, event_id: str) -> None:
+        logger.debug("BillingWebhookService: Handling webhook event %s (ID: %s)", event_type, event_id)
         
         try:
             if event_type == "checkout.session.completed":
@@ -99,15 +122,39 @@ class BillingWebhookService:
             
             else:
                 # Global Rule 6: Return 200 even for ignored events
-                logger.debug(f"BillingWebhookService: Unhandled event type {event_type} (stored but ignored)")
+                logger.debug("BillingWebhookService: Unhandled event type %s (stored but ignored)", event_type)
             
             # Only mark as processed after successful handling
             await self._mark_event_processed(event_id)
         
         except Exception as e:
-            logger.error(f"BillingWebhookService: Error handling event {event_type}: {e}", exc_info=True)
+            logger.error("BillingWebhookService: Error handling event %s: %s", event_type, e, exc_info=True)
             raise
     
+    async def redrive_unprocessed_events(self, stale_after_seconds: int, limit: int) -> int:
+        """
+        Handle recorded events whose processing never finished
+        
+        Returns the number of events handled successfully.
+        """
+        events = await self.stripe_event_repo.claim_unprocessed(stale_after_seconds, limit)
+        
+        processed = 0
+        for event in events:
+            logger.info("BillingWebhookService: Re-driving event %s of type %s", event.stripe_event_id, event.type)
+            try:
+                await self.process_webhook_event(
+                    event.type,
+                    event.payload["data"]["object"],
+                    event.stripe_event_id
+                )
+                processed += 1
+            except Exception:
+                # Already logged; the row stays unprocessed for the next sweep
+                pass
+        
+        return processed
+    
     async def handle_checkout_session_completed(self, session: dict) -> None:
         logger.info("BillingWebhookService: Processing checkout.session.completed")
         
@@ -130,18 +177,19 @@ class BillingWebhookService:
             return
         
         try:
-            subscription = stripe.Subscription.retrieve(
+            subscription = await asyncio.to_thread(
+                stripe.Subscription.retrieve,
                 subscription_id,
                 expand=["items.data.price"]
             )
-        except Exception:
-            logger.error("BillingWebhookService: Failed to retrieve subscription {subscription_id}: {e}")
+        except Exception as e:
+            logger.error("BillingWebhookService: Failed to retrieve subscription %s: %s", subscription_id, e, exc_info=True)
             raise
         
         # Step 3: Read subscription data
         items = subscription.get("items", {}).get("data", [])
         if len(items) != 1:
-            logger.error(f"BillingWebhookService: Unexpected subscription items layout for {subscription_id}: {len(items)} items")
+            logger.error("BillingWebhookService: Unexpected subscription items layout for %s: %s items", subscription_id, len(items))
             raise ValueError(f"Expected exactly 1 subscription item, found {len(items)}")
         
         item = items[0]
@@ -183,14 +231,14 @@ class BillingWebhookService:
         # Find organization by ID (from metadata)
         org = await self.org_repo.find_by_id(int(organization_id))
         if not org:
-            logger.error(f"BillingWebhookService: Organization {organization_id} not found")
+            logger.error("BillingWebhookService: Organization %s not found", organization_id)
             return
         
         updated_org = await self.org_repo.update(org.id, update_data)
         if updated_org:
-            logger.info(f"BillingWebhookService: Updated organization {org.id} from checkout.session.completed - plan={plan_type.value}, status={status.value}, seats={quantity}")
+            logger.info("BillingWebhookService: Updated organization %s from checkout.session.completed - plan=%s, status=%s, seats=%s", org.id, plan_type.value, status.value, quantity)
         else:
-            logger.error(f"BillingWebhookService: Failed to update organization {org.id}")
+            logger.error("BillingWebhookService: Failed to update organization %s", org.id)
             raise ValueError(f"Failed to update organization {org.id}")
     
     async def handle_invoice_payment_succeeded(self, invoice: dict) -> None:
@@ -220,7 +268,7 @@ class BillingWebhookService:
         # Find organization by customer_id (more reliable than subscription_id due to webhook timing)
         org = await self.org_repo.find_by_stripe_customer_id(customer_id)
         if not org:
-            logger.error(f"BillingWebhookService: Organization not found for customer {customer_id}")
+            logger.error("BillingWebhookService: Organization not found for customer %s", customer_id)
             raise ValueError(f"Organization not found for customer {customer_id} - webhook may be out of order, will retry")
         
         # Extract period_end and subscription_item_id from correct Stripe field path
@@ -257,9 +305,9 @@ class BillingWebhookService:
         
         updated_org = await self.org_repo.update(org.id, update_data)
         if updated_org:
-            logger.info(f"BillingWebhookService: Updated organization {org.id} status to active")
+            logger.info("BillingWebhookService: Updated organization %s status to active", org.id)
         else:
-            logger.error(f"BillingWebhookService: Failed to update organization {org.id}")
+            logger.error("BillingWebhookService: Failed to update organization %s", org.id)
     
     async def handle_invoice_payment_failed(self, invoice: dict) -> None:
         logger.warning("BillingWebhookService: Processing invoice.payment_failed")
@@ -286,7 +334,7 @@ class BillingWebhookService:
         # Find organization by customer_id (more reliable than subscription_id due to webhook timing)
         org = await self.org_repo.find_by_stripe_customer_id(customer_id)
         if not org:
-            logger.error(f"BillingWebhookService: Organization not found for customer {customer_id}")
+            logger.error("BillingWebhookService: Organization not found for customer %s", customer_id)
             raise ValueError(f"Organization not found for customer {customer_id} - webhook may be out of order, will retry")
         
         # DB updates
@@ -296,9 +344,9 @@ class BillingWebhookService:
         
         updated_org = await self.org_repo.update(org.id, update_data)
         if updated_org:
-            logger.info(f"BillingWebhookService: Updated organization {org.id} status to past_due")
+            logger.info("BillingWebhookService: Updated organization %s status to past_due", org.id)
         else:
-            logger.error(f"BillingWebhookService: Failed to update organization {org.id}")
+            logger.error("BillingWebhookService: Failed to update organization %s", org.id)
     
     async def handle_invoice_payment_action_required(self, invoice: dict) -> None:
         logger.warning("BillingWebhookService: Processing invoice.payment_action_required")
@@ -321,7 +369,7 @@ class BillingWebhookService:
         # Find organization by customer_id (more reliable than subscription_id due to webhook timing)
         org = await self.org_repo.find_by_stripe_customer_id(customer_id)
         if not org:
-            logger.error(f"BillingWebhookService: Organization not found for customer {customer_id}")
+            logger.error("BillingWebhookService: Organization not found for customer %s", customer_id)
             raise ValueError(f"Organization not found for customer {customer_id} - webhook may be out of order, will retry")
         
         # DB updates
@@ -331,9 +379,9 @@ class BillingWebhookService:
         
         updated_org = await self.org_repo.update(org.id, update_data)
         if updated_org:
-            logger.info(f"BillingWebhookService: Updated organization {org.id} status to past_due")
+            logger.info("BillingWebhookService: Updated organization %s status to past_due", org.id)
         else:
-            logger.error(f"BillingWebhookService: Failed to update organization {org.id}")
+            logger.error("BillingWebhookService: Failed to update organization %s", org.id)
     
     async def handle_subscription_updated(self, subscription: dict) -> None:
         logger.debug("BillingWebhookService: Processing customer.subscription.updated")
@@ -346,13 +394,13 @@ class BillingWebhookService:
         # Find organization
         org = await self.org_repo.find_by_stripe_subscription_id(subscription_id)
         if not org:
-            logger.warning(f"BillingWebhookService: Organization not found for subscription {subscription_id}")
+            logger.warning("BillingWebhookService: Organization not found for subscription %s", subscription_id)
             return
         
         # Guard against multiple subscription items
         items = subscription.get("items", {}).get("data", [])
         if len(items) != 1:
-            logger.error(f"BillingWebhookService: Unexpected subscription items layout for {subscription_id}: {len(items)} items")
+            logger.error("BillingWebhookService: Unexpected subscription items layout for %s: %s items", subscription_id, len(items))
             return  # Skip update if unexpected layout
         
         item = items[0]
@@ -394,18 +442,18 @@ class BillingWebhookService:
         updated_org = await self.org_repo.update(org.id, update_data)
         if updated_org:
             if plan_changed:
-                logger.info(f"BillingWebhookService: Plan changed for organization {org.id}: {old_plan_type.value} → {new_plan_type.value}, seats={quantity}, cancel_at_period_end={cancel_at_period_end}")
+                logger.info("BillingWebhookService: Plan changed for organization %s: %s → %s, seats=%s, cancel_at_period_end=%s", org.id, old_plan_type.value, new_plan_type.value, quantity, cancel_at_period_end)
             else:
-                logger.info(f"BillingWebhookService: Updated organization {org.id} configuration - seats={quantity}, cancel_at_period_end={cancel_at_period_end}")
+                logger.info("BillingWebhookService: Updated organization %s configuration - seats=%s, cancel_at_period_end=%s", org.id, quantity, cancel_at_period_end)
             
             # Handle downgrade from BUSINESS to PRO - deactivate excess members
             if downgraded_to_pro:
-                logger.info(f"BillingWebhookService: Handling BUSINESS → PRO downgrade for organization {org.id}")
+                logger.info("BillingWebhookService: Handling BUSINESS → PRO downgrade for organization %s", org.id)
                 deactivated_count = await self.org_service.deactivate_non_owner_members(org.id)
                 if deactivated_count > 0:
-                    logger.info(f"BillingWebhookService: Deactivated {deactivated_count} members for organization {org.id} after downgrade to PRO")
+                    logger.info("BillingWebhookService: Deactivated %s members for organization %s after downgrade to PRO", deactivated_count, org.id)
         else:
-            logger.error(f"BillingWebhookService: Failed to update organization {org.id}")
+            logger.error("BillingWebhookService: Failed to update organization %s", org.id)
             raise ValueError(f"Failed to update organization {org.id}")
     
     async def handle_subscription_deleted(self, subscription: dict) -> None:
@@ -419,7 +467,7 @@ class BillingWebhookService:
         # Find organization
         org = await self.org_repo.find_by_stripe_subscription_id(subscription_id)
         if not org:
-            logger.warning(f"BillingWebhookService: Organization not found for subscription {subscription_id}")
+            logger.warning("BillingWebhookService: Organization not found for subscription %s", subscription_id)
             return
         
         # DB updates - final downgrade
@@ -433,14 +481,14 @@ class BillingWebhookService:
         
         updated_org = await self.org_repo.update(org.id, update_data)
         if updated_org:
-            logger.info(f"BillingWebhookService: Set organization {org.id} to FREE plan after subscription deletion")
+            logger.info("BillingWebhookService: Set organization %s to FREE plan after subscription deletion", org.id)
             
             # Auto-deactivate all non-owner members
             deactivated_count = await self.org_service.deactivate_non_owner_members(org.id)
             if deactivated_count > 0:
-                logger.info(f"BillingWebhookService: Deactivated {deactivated_count} members for organization {org.id}")
+                logger.info("BillingWebhookService: Deactivated %s members for organization %s", deactivated_count, org.id)
         else:
-            logger.error(f"BillingWebhookService: Failed to update organization {org.id}")
+            logger.error("BillingWebhookService: Failed to update organization %s", org.id)
             raise ValueError(f"Failed to update organization {org.id}")
     
     async def handle_charge_dispute_created(self, dispute: dict) -> None:
@@ -453,7 +501,7 @@ class BillingWebhookService:
             return
         
         try:
-            charge = stripe.Charge.retrieve(charge_id, expand=["invoice"])
+            charge = await asyncio.to_thread(stripe.Charge.retrieve, charge_id, expand=["invoice"])
             invoice_id = charge.get("invoice")
             if not invoice_id:
                 logger.warning("BillingWebhookService: No invoice_id in charge")
@@ -463,7 +511,7 @@ class BillingWebhookService:
             if isinstance(invoice_id, dict):
                 invoice = invoice_id
             else:
-                invoice = stripe.Invoice.retrieve(invoice_id, expand=["subscription"])
+                invoice = await asyncio.to_thread(stripe.Invoice.retrieve, invoice_id, expand=["subscription"])
             
             # Extract subscription_id from nested parent structure (new API) or top-level (legacy)
             parent = invoice.get("parent", {})
@@ -484,13 +532,13 @@ class BillingWebhookService:
                 logger.error("BillingWebhookService: Invoice has no customer_id")
                 raise ValueError("Invoice missing customer_id")
         except Exception as e:
-            logger.error(f"BillingWebhookService: Failed to retrieve charge/invoice: {e}", exc_info=True)
+            logger.error("BillingWebhookService: Failed to retrieve charge/invoice: %s", e, exc_info=True)
             raise
         
         # Find organization by customer_id (more reliable than subscription_id due to webhook timing)
         org = await self.org_repo.find_by_stripe_customer_id(customer_id)
         if not org:
-            logger.error(f"BillingWebhookService: Organization not found for customer {customer_id}")
+            logger.error("BillingWebhookService: Organization not found for customer %s", customer_id)
             raise ValueError(f"Organization not found for customer {customer_id} - webhook may be out of order, will retry")
         
         # DB updates
@@ -500,7 +548,27 @@ class BillingWebhookService:
         
         updated_org = await self.org_repo.update(org.id, update_data)
         if updated_org:
-            logger.warning(f"BillingWebhookService: Set organization {org.id} status to restricted due to dispute")
+            logger.warning("BillingWebhookService: Set organization %s status to restricted due to dispute", org.id)
         else:
-            logger.error(f"BillingWebhookService: Failed to update organization {org.id}")
-            raise ValueError(f"Failed to update organization {org.id}")
\ No newline at end of file
+            logger.error("BillingWebhookService: Failed to update organization %s", org.id)
+            raise ValueError(f"Failed to update organization {org.id}")
+
+
+async def run_stripe_event_redrive() -> None:
+    """Periodically re-drive unprocessed Stripe events until cancelled"""
+    webhook_service = BillingWebhookService(
+        OrganizationRepository(supabase),
+        StripeEventRepository(supabase)
+    )
+    
+    while True:
+        await asyncio.sleep(STRIPE_EVENT_REDRIVE_INTERVAL)
+        try:
+            processed = await webhook_service.redrive_unprocessed_events(
+                STRIPE_EVENT_REDRIVE_STALE_AFTER,
+                STRIPE_EVENT_REDRIVE_BATCH
+            )
+            if processed:
+                logger.info("BillingWebhookService: Re-drove %d unprocessed events", processed)
+        except Exception:
+            logger.error("BillingWebhookService: Stripe event re-drive sweep failed", exc_info=True)
@@ -4,6 +4,7 @@ from typing import Optional
 
 from dotenv import load_dotenv
 from supabase import Client, create_client  # type: ignore
+from supabase.lib.client_options import SyncClientOptions  # type: ignore
 
 load_dotenv(dotenv_path=".env")
 
@@ -21,7 +22,13 @@ def get_supabase_client() -> Client:
         if not url or not key:
             raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
         
-        _supabase_client = create_client(url, key)
+        from app.config import supabase_http_client
+        
+        _supabase_client = create_client(
+            url,
+            key,
+            options=SyncClientOptions(httpx_client=supabase_http_client)
+        )
     
     return _supabase_client
 
@@ -1,4 +1,5 @@
 """Base repository with common CRUD operations"""
+import asyncio
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
 
 from pydantic import BaseModel
@@ -30,7 +31,8 @@ class BaseRepository(Generic[T, CreateT, UpdateT]):
     
     async def find_by_id(self, id: int) -> Optional[T]:
         """Find a single record by ID"""
-        response = self._client.table(self._table_name).select("*").eq("id", id).execute()
+        query = self._client.table(self._table_name).select("*").eq("id", id)
+        response = await asyncio.to_thread(query.execute)
         
         if not response.data:
             return None
@@ -47,7 +49,7 @@ class BaseRepository(Generic[T, CreateT, UpdateT]):
         if offset:
             query = query.offset(offset)
         
-        response = query.execute()
+        response = await asyncio.to_thread(query.execute)
         return self._to_models(response.data)
     
     async def find_by_filters(self, filters: Dict[str, Any], limit: Optional[int] = None) -> List[T]:
@@ -60,13 +62,14 @@ class BaseRepository(Generic[T, CreateT, UpdateT]):
         if limit:
             query = query.limit(limit)
         
-        response = query.execute()
+        response = await asyncio.to_thread(query.execute)
         return self._to_models(response.data)
     
     async def create(self, data: CreateT) -> T:
         """Create a new record"""
         data_dict = data.model_dump(exclude_unset=True, mode='json')
-        response = self._client.table(self._table_name).insert(data_dict).execute()
+        query = self._client.table(self._table_name).insert(data_dict)
+        response = await asyncio.to_thread(query.execute)
         
         if not response.data:
             raise ValueError("Failed to create record")
@@ -81,7 +84,8 @@ class BaseRepository(Generic[T, CreateT, UpdateT]):
             # No fields to update
             return await self.find_by_id(id)
         
-        response = self._client.table(self._table_name).update(data_dict).eq("id", id).execute()
+        query = self._client.table(self._table_name).update(data_dict).eq("id", id)
+        response = await asyncio.to_thread(query.execute)
         
         if not response.data:
             return None
@@ -90,17 +94,18 @@ class BaseRepository(Generic[T, CreateT, UpdateT]):
     
     async def delete(self, id: int) -> bool:
         """Delete a record by ID"""
-        response = self._client.table(self._table_name).delete().eq("id", id).execute()
+        query = self._client.table(self._table_name).delete().eq("id", id)
+        response = await asyncio.to_thread(query.execute)
         return len(response.data) > 0
     
     async def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
         """Count records matching filters"""
-        query = self._client.table(self._table_name).select("id", count="exact")
+        query = self._client.table(self._table_name).select("id", count="exact", head=True)
         
         if filters:
             for key, value in filters.items():
                 query = query.eq(key, value)
         
-        response = query.execute()
+        response = await asyncio.to_thread(query.execute)
         return response.count or 0
 
@@ -1,4 +1,5 @@
 """Notes repository"""
+import asyncio
 from datetime import datetime
 from typing import List, Optional, Tuple
 
@@ -42,15 +43,14 @@ class NoteRepository(BaseRepository[Note, NoteCreate, NoteUpdate]):
             )
             
             if exclude_user_ids:
-                # user_idを除外
-                for user_id in user_id_filter:
-                    query = query.neq("workspace.workspace_member.user_id", user_id)
+                # user_idを除外（NOT IN を1つのフィルタで送る）
+                query = query.not_.in_("workspace.workspace_member.user_id", user_id_filter)
             else:
                 # user_idでフィルタ
                 query = query.in_("workspace.workspace_member.user_id", user_id_filter)
             
             query = query.order("updated_at", desc=False)
-            response = query.execute()
+            response = await asyncio.to_thread(query.execute)
             
             # ネストされたデータから notes だけを抽出
             notes_data = []
@@ -68,30 +68,30 @@ class NoteRepository(BaseRepository[Note, NoteCreate, NoteUpdate]):
                 .gte("updated_at", since.isoformat())
                 .order("updated_at", desc=False)
             )
-            response = query.execute()
+            response = await asyncio.to_thread(query.execute)
             return self._to_models(response.data)
 
     async def get_note_assignee_user_ids(self, note_id: int) -> List[str]:
         """Get user IDs of all assignees for a note"""
-        response = (
+        query = (
             self._client.table("workspace_member_note")
             .select("workspace_member!inner(user_id)")
             .eq("note_id", note_id)
             .eq("workspace_member_note_role", "assignee")
-            .execute()
         )
+        response = await asyncio.to_thread(query.execute)
         return [item["workspace_member"]["user_id"] for item in response.data]
     
     async def get_note_assignee_user_and_member_ids(self, note_id: int) -> List[Tuple[str, int]]:
         """Get (user_id, workspace_member_id) tuples for all assignees of a note"""
-        response = (
+        query = (
             self._client.table("workspace_member_note")
             .select("workspace_member_id, workspace_member!inner(user_id)")
             .eq("note_id", note_id)
             .eq("workspace_member_note_role", "assignee")
-            .execute()
         )
+        response = await asyncio.to_thread(query.execute)
         return [
             (item["workspace_member"]["user_id"], item["workspace_member_id"])
             for item in response.data
-        ]
\ No newline at end of file
+        ]
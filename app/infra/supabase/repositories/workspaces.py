@@ -1,4 +1,5 @@
 """Workspace repository"""
+import asyncio
 from typing import List
 
 from supabase import Client  # type: ignore
@@ -34,7 +35,7 @@ class WorkspaceRepository(BaseRepository[Workspace, WorkspaceCreate, WorkspaceUp
             .select("*, workspace_member!inner(*)")
             .eq("workspace_member.user_id", user_id)
         )
-        response = query.execute()
+        response = await asyncio.to_thread(query.execute)
         return self._to_models(response.data)
 
 
@@ -47,4 +48,3 @@ class WorkspaceMemberRepository(BaseRepository[WorkspaceMember, WorkspaceMemberC
     async def find_by_workspace(self, workspace_id: int) -> List[WorkspaceMember]:
         """Find all members of a workspace"""
         return await self.find_by_filters({"workspace_id": workspace_id})
-
@@ -1,18 +1,33 @@
+import asyncio
 import logging
+import logging.handlers
 import os
+import queue
 
 # Log configuration (before other imports)
+# Handlers only enqueue records; a listener thread formats them and writes to
+# stderr so request handlers never block on the stream.
 # ruff: noqa: E402
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(
+    logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+)
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    handlers=[_queue_handler],
     force=True
 )
+log_listener.start()
 
 from fastapi import FastAPI, APIRouter  # noqa: E402
 from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
 from app.api import push_notifications, users, organizations  # noqa: E402
 from app.features import billing  # noqa: E402
+from app.features.billing.webhook_service import run_stripe_event_redrive  # noqa: E402
 
 app = FastAPI(
     title="Cogni Backend API",
@@ -87,8 +102,18 @@ def read_root():
     }
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Start the Stripe event re-drive loop"""
+    app.state.stripe_event_redrive = asyncio.create_task(run_stripe_event_redrive())
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close database connections on shutdown"""
+    """Stop background work and close database connections on shutdown"""
+    app.state.stripe_event_redrive.cancel()
     from app.db.session import engine
+    from app.config import supabase_http_client
     await engine.dispose()
+    supabase_http_client.close()
+    log_listener.stop()
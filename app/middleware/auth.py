@@ -12,6 +12,8 @@ from fastapi import HTTPException, Header
 from jose import jwt, jwk
 import httpx
 
+from app.utils.token_cache import VerifiedTokenCache
+
 logger = logging.getLogger(__name__)
 
 # JWKS cache (similar to hocuspocus implementation)
@@ -22,6 +24,10 @@ JWKS_CACHE_DURATION = 60 * 60  # 1 hour in seconds (matching hocuspocus)
 # JWT configuration
 JWT_AUDIENCE = "authenticated"
 
+# Verified tokens -> user id (see get_current_user_id)
+TOKEN_CACHE_TTL = 60
+_token_cache = VerifiedTokenCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL)
+
 
 def get_supabase_url() -> str:
     """Get Supabase URL from environment"""
@@ -200,9 +206,14 @@ async def get_current_user_id(
             detail="Invalid authorization header format. Expected 'Bearer <token>'"
         )
     
+    cached_user_id = _token_cache.get(token)
+    if cached_user_id is not None:
+        return cached_user_id
+    
     # Verify token and extract user ID
     payload = await verify_token(token)
     user_id = get_user_id_from_payload(payload)
     
+    _token_cache.set(token, user_id, payload.get("exp"))
     return user_id
 
@@ -7,7 +7,7 @@ Handles sending push notifications via Expo Push API
 import httpx
 import logging
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from supabase import Client
 from app.models.push_notification import (
     ExpoPushMessage,
@@ -41,11 +41,11 @@ class PushNotificationService:
                 self.supabase.table("push_notifications")
                 .select("*")
                 .eq("id", notification_id)
-                .single()
+                .maybe_single()
                 .execute()
             )
 
-            if not response.data:
+            if response is None:
                 raise ValueError("Notification not found")
 
             notification = response.data
@@ -88,10 +88,11 @@ class PushNotificationService:
             # Get unread message count for the user
             unread_message_count = await self.get_unread_message_count(notification["user_id"])
 
-            # Build Expo push messages
+            # Build Expo push messages (one per distinct token, order preserved)
+            expo_tokens = list(dict.fromkeys(t["expo_push_token"] for t in tokens))
             messages = [
                 {
-                    "to": token["expo_push_token"],
+                    "to": expo_token,
                     "badge": unread_message_count,
                     "title": notification["title"],
                     "body": notification["body"],
@@ -100,7 +101,7 @@ class PushNotificationService:
                     "priority": "high",
                     "channelId": "default",
                 }
-                for token in tokens
+                for expo_token in expo_tokens
             ]
 
             # Send to Expo Push API
@@ -132,19 +133,21 @@ class PushNotificationService:
                 errors = [t for t in tickets if t.get("status") == "error"]
 
                 if errors:
-                    # Handle invalid tokens
-                    for i, error in enumerate(errors):
-                        error_type = error.get("details", {}).get("error")
-                        error_message = error.get("message", "")
+                    # Handle invalid tokens (tickets are in the same order as messages)
+                    for i, ticket in enumerate(tickets):
+                        if ticket.get("status") != "error":
+                            continue
+                        error_type = ticket.get("details", {}).get("error")
+                        error_message = ticket.get("message", "")
 
                         if error_type == "DeviceNotRegistered" or "not registered" in error_message:
                             # Remove invalid token
-                            if i < len(tokens):
-                                invalid_token = tokens[i]["expo_push_token"]
+                            if i < len(expo_tokens):
+                                invalid_token = expo_tokens[i]
                                 self.supabase.table("push_tokens").delete().eq(
                                     "expo_push_token", invalid_token
                                 ).execute()
-                                logger.info(f"Removed invalid token: {invalid_token}")
+                                logger.info("Removed invalid token: %s", invalid_token)
 
                     # Mark as sent if at least some succeeded
                     if len(errors) < len(tickets):
@@ -172,7 +175,7 @@ class PushNotificationService:
                 }
 
         except Exception as e:
-            logger.error(f"Error sending push notification: {str(e)}")
+            logger.error("Error sending push notification: %s", str(e))
             await self._update_notification_status(
                 notification_id, PushNotificationStatus.FAILED, str(e)
             )
@@ -184,7 +187,7 @@ class PushNotificationService:
         """Update notification status in database"""
         update_data = {
             "status": status,
-            "sent_at": datetime.utcnow().isoformat(),
+            "sent_at": datetime.now(timezone.utc).isoformat(),
         }
 
         if error_message:
@@ -213,5 +216,5 @@ class PushNotificationService:
             
             return 0
         except Exception as e:
-            logger.error(f"Error getting unread message count for user {user_id}: {e}")
+            logger.error("Error getting unread message count for user %s: %s", user_id, e)
             return 0
\ No newline at end of file
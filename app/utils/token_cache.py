@@ -0,0 +1,43 @@
+"""In-process cache of verified bearer tokens"""
+import hashlib
+import time
+from typing import Optional
+
+from app.utils.ttl_cache import TTLCache
+
+
+class VerifiedTokenCache:
+    """
+    Maps verified access tokens to their user id.
+    
+    Clients reuse the same access token for many requests, so a hit skips
+    header parsing and signature verification. Tokens are keyed by a digest
+    so raw tokens are not kept in memory, and entries never outlive the
+    token's own exp claim. Only the immutable (user_id, exp) pair is stored,
+    so callers cannot alter what later requests see.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache[tuple[str, Optional[float]]] = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+    
+    def get(self, token: str) -> Optional[str]:
+        """Return the user id for a cached, unexpired token, or None"""
+        key = self._key(token)
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        
+        user_id, exp = cached
+        if exp is not None and time.time() >= exp:
+            self._cache.invalidate(key)
+            return None
+        
+        return user_id
+    
+    def set(self, token: str, user_id: str, exp: Optional[float]) -> None:
+        """Remember a token that has just been verified"""
+        self._cache.set(self._key(token), (user_id, exp))
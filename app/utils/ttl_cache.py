@@ -0,0 +1,65 @@
+"""Small in-process TTL cache"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar('V')
+
+
+class TTLCache(Generic[V]):
+    """
+    Bounded key/value cache whose entries expire after a fixed time-to-live.
+    
+    Entries are evicted oldest-first once maxsize is reached. The cache is
+    per-process, so values may be stale by up to ttl seconds when another
+    worker writes the same row.
+    
+    Access is guarded by a lock because sync route handlers and
+    asyncio.to_thread calls use the cache from worker threads.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                self._data.pop(key, None)
+                return None
+            
+            return value
+    
+    def set(self, key: Hashable, value: V) -> None:
+        """Store a value, evicting the oldest entry when full"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
@@ -0,0 +1,15 @@
+-- Indexes for the organization member / invitation lookups done by the API.
+--
+-- organization_members is filtered by (organization_id, user_id, status = 'active')
+-- for every owner/admin check and by (organization_id, status = 'active') for the
+-- member list. organization_invitations is filtered by
+-- (organization_id, invitee_email, status = 'pending') before each new invitation.
+-- Partial indexes keep both small since only active / pending rows are queried.
+
+CREATE INDEX IF NOT EXISTS idx_org_members_org_user_active
+    ON public.organization_members (organization_id, user_id)
+    WHERE status = 'active';
+
+CREATE INDEX IF NOT EXISTS idx_org_invites_org_email_pending
+    ON public.organization_invitations (organization_id, invitee_email)
+    WHERE status = 'pending';
@@ -0,0 +1,15 @@
+-- Look invitations up by a fixed-size SHA-256 digest of the token instead of
+-- the variable-length token text.
+--
+-- The plaintext token is still stored because the invitation list endpoint
+-- rebuilds invitation links from it. The API passes the plaintext token and
+-- the database hashes it with sha256(token::bytea). Tokens are URL-safe base64
+-- (or legacy UUIDs), which contain no backslashes, so the text-to-bytea cast
+-- is just their bytes; the accept request rejects any other characters.
+
+ALTER TABLE public.organization_invitations
+    ADD COLUMN IF NOT EXISTS token_hash bytea
+    GENERATED ALWAYS AS (sha256(token::bytea)) STORED;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_org_invites_token_hash
+    ON public.organization_invitations (token_hash);
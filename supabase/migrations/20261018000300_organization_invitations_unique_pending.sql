@@ -0,0 +1,24 @@
+-- Allow at most one pending invitation per (organization, email).
+--
+-- The API inserts the invitation directly and treats a unique violation as
+-- "pending invitation already exists" instead of checking with a SELECT first.
+
+-- Keep only the newest pending invitation per email before adding the constraint
+UPDATE public.organization_invitations AS i
+SET status = 'cancelled'
+WHERE i.status = 'pending'
+  AND EXISTS (
+      SELECT 1
+      FROM public.organization_invitations AS newer
+      WHERE newer.organization_id = i.organization_id
+        AND newer.invitee_email = i.invitee_email
+        AND newer.status = 'pending'
+        AND (newer.created_at, newer.id) > (i.created_at, i.id)
+  );
+
+-- Superseded by the unique index below (same columns and predicate)
+DROP INDEX IF EXISTS public.idx_org_invites_org_email_pending;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_org_invites_org_email_pending
+    ON public.organization_invitations (organization_id, invitee_email)
+    WHERE status = 'pending';
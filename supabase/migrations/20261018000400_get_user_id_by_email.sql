@@ -0,0 +1,23 @@
+-- Targeted auth.users lookup by email.
+--
+-- Checking whether an invitee is already a member used to page through every
+-- user via the admin API and compare emails in Python. This function resolves a
+-- single email to its user id server-side so the check becomes two indexed
+-- queries. auth.users is not exposed through PostgREST, hence SECURITY DEFINER;
+-- execution is restricted to the service role.
+
+CREATE OR REPLACE FUNCTION public.get_user_id_by_email(email text)
+RETURNS uuid
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+    SELECT u.id
+    FROM auth.users u
+    WHERE lower(u.email) = lower(get_user_id_by_email.email)
+    LIMIT 1;
+$$;
+
+REVOKE ALL ON FUNCTION public.get_user_id_by_email(text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.get_user_id_by_email(text) TO service_role;
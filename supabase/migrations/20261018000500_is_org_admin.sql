@@ -0,0 +1,24 @@
+-- Owner/admin authorization check in a single call.
+--
+-- Returns true when the user is an active owner (role 1) or admin (role 2) of
+-- the organization, false when they are an active member with another role and
+-- NULL when they are not an active member at all, so the API can keep its
+-- distinct 403 messages without fetching the member row.
+
+CREATE OR REPLACE FUNCTION public.is_org_admin(p_org bigint, p_user uuid)
+RETURNS boolean
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+    SELECT m.role_id IN (1, 2)
+    FROM public.organization_members m
+    WHERE m.organization_id = p_org
+      AND m.user_id = p_user
+      AND m.status = 'active'
+    LIMIT 1;
+$$;
+
+REVOKE ALL ON FUNCTION public.is_org_admin(bigint, uuid) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.is_org_admin(bigint, uuid) TO service_role;
@@ -0,0 +1,23 @@
+-- Organization members joined with profile, email and role in one relation.
+--
+-- The members endpoint used to read organization_members, then user_profiles,
+-- then every auth user (for emails), then organization_member_roles, and zip
+-- the results in Python. This view lets it read everything in one query.
+--
+-- The view runs with its owner's rights so it can read auth.users; access is
+-- therefore limited to the service role so emails are never exposed to clients.
+
+CREATE OR REPLACE VIEW public.organization_members_enriched AS
+SELECT
+    m.*,
+    u.email,
+    p.name,
+    p.avatar_url,
+    r.name AS role_name
+FROM public.organization_members m
+LEFT JOIN auth.users u ON u.id = m.user_id
+LEFT JOIN public.user_profiles p ON p.id = m.user_id
+LEFT JOIN public.organization_member_roles r ON r.id = m.role_id;
+
+REVOKE ALL ON public.organization_members_enriched FROM PUBLIC, anon, authenticated;
+GRANT SELECT ON public.organization_members_enriched TO service_role;
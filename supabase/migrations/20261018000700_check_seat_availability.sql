@@ -0,0 +1,29 @@
+-- Seat usage for an organization in one query.
+--
+-- The invitation endpoint needs the active member count, the number of pending
+-- invitations and the purchased seat count. Reading them together avoids a
+-- separate COUNT round trip and works from the current row rather than a
+-- cached organization.
+
+CREATE OR REPLACE FUNCTION public.check_seat_availability(p_org bigint)
+RETURNS TABLE (current_members integer, pending_invitations integer, seats integer)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+    SELECT
+        coalesce(o.active_member_count, 0)::integer,
+        (
+            SELECT count(*)::integer
+            FROM public.organization_invitations i
+            WHERE i.organization_id = o.id
+              AND i.status = 'pending'
+        ),
+        coalesce(o.seat_count, 1)::integer
+    FROM public.organizations o
+    WHERE o.id = p_org;
+$$;
+
+REVOKE ALL ON FUNCTION public.check_seat_availability(bigint) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.check_seat_availability(bigint) TO service_role;
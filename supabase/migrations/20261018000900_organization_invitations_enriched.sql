@@ -0,0 +1,19 @@
+-- Organization invitations joined with role and inviter names.
+--
+-- The invitations list used to fetch roles by id and then each inviter's
+-- profile in separate queries. organization_invitations has no foreign key to
+-- user_profiles for PostgREST to embed, so the join lives in a view, like
+-- organization_members_enriched. Invitations carry tokens, so the view is
+-- limited to the service role.
+
+CREATE OR REPLACE VIEW public.organization_invitations_enriched AS
+SELECT
+    i.*,
+    r.name AS role_name,
+    p.name AS inviter_name
+FROM public.organization_invitations i
+LEFT JOIN public.organization_member_roles r ON r.id = i.role_id
+LEFT JOIN public.user_profiles p ON p.id = i.inviter_id;
+
+REVOKE ALL ON public.organization_invitations_enriched FROM PUBLIC, anon, authenticated;
+GRANT SELECT ON public.organization_invitations_enriched TO service_role;
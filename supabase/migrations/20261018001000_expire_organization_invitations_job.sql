@@ -0,0 +1,110 @@
+-- Expire organization invitations from a scheduled job.
+--
+-- Pending invitations past expires_at used to be marked expired inline by the
+-- accept and create paths. A pg_cron job now sweeps them every minute, so the
+-- request paths only have to refuse the few that expired since the last run.
+-- accept_organization_invitation no longer writes in its expired branch.
+
+CREATE EXTENSION IF NOT EXISTS pg_cron WITH SCHEMA pg_catalog;
+
+CREATE INDEX IF NOT EXISTS idx_org_invites_pending_expires_at
+    ON public.organization_invitations (expires_at)
+    WHERE status = 'pending';
+
+SELECT cron.unschedule(jobid)
+FROM cron.job
+WHERE jobname = 'expire-organization-invitations';
+
+SELECT cron.schedule(
+    'expire-organization-invitations',
+    '* * * * *',
+    $$UPDATE public.organization_invitations
+      SET status = 'expired'
+      WHERE status = 'pending'
+        AND expires_at < now()$$
+);
+
+CREATE OR REPLACE FUNCTION public.accept_organization_invitation(p_token text, p_user uuid)
+RETURNS TABLE (status text, organization_id bigint, organization_name text, seat_count integer)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+    v_inv public.organization_invitations%ROWTYPE;
+    v_org public.organizations%ROWTYPE;
+    v_role_id bigint;
+BEGIN
+    SELECT * INTO v_inv
+    FROM public.organization_invitations i
+    WHERE i.token_hash = sha256(p_token::bytea)
+      AND i.status = 'pending'
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'not_found'::text, NULL::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    -- Status is flipped to 'expired' by the expire-organization-invitations
+    -- job; here we only refuse invitations it has not swept yet
+    IF v_inv.expires_at < now() THEN
+        RETURN QUERY SELECT 'expired'::text, v_inv.organization_id::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    SELECT * INTO v_org
+    FROM public.organizations o
+    WHERE o.id = v_inv.organization_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'organization_not_found'::text, v_inv.organization_id::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1
+        FROM public.organization_members m
+        WHERE m.organization_id = v_org.id
+          AND m.user_id = p_user
+          AND m.status = 'active'
+    ) THEN
+        UPDATE public.organization_invitations
+        SET status = 'accepted', accepted_at = now(), invitee_id = p_user
+        WHERE id = v_inv.id;
+
+        RETURN QUERY SELECT 'already_member'::text, v_org.id::bigint, v_org.name::text, v_org.seat_count::integer;
+        RETURN;
+    END IF;
+
+    IF v_org.plan_type::text = 'business'
+       AND v_org.stripe_subscription_id IS NOT NULL
+       AND coalesce(v_org.active_member_count, 0) >= coalesce(v_org.seat_count, 1) THEN
+        RETURN QUERY SELECT 'no_seats'::text, v_org.id::bigint, v_org.name::text, coalesce(v_org.seat_count, 1)::integer;
+        RETURN;
+    END IF;
+
+    v_role_id := coalesce(
+        v_inv.role_id,
+        (SELECT r.id FROM public.organization_member_roles r WHERE r.name = 'member' LIMIT 1),
+        3
+    );
+
+    INSERT INTO public.organization_members (organization_id, user_id, role_id, status)
+    VALUES (v_org.id, p_user, v_role_id, 'active');
+
+    UPDATE public.organization_invitations
+    SET status = 'accepted', accepted_at = now(), invitee_id = p_user
+    WHERE id = v_inv.id;
+
+    UPDATE public.organizations
+    SET active_member_count = coalesce(active_member_count, 0) + 1
+    WHERE id = v_org.id;
+
+    RETURN QUERY SELECT 'accepted'::text, v_org.id::bigint, v_org.name::text, v_org.seat_count::integer;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.accept_organization_invitation(text, uuid) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.accept_organization_invitation(text, uuid) TO service_role;
@@ -0,0 +1,11 @@
+-- Index for the paginated invitations list.
+--
+-- Pending lookups by (organization_id, invitee_email) and the pending count by
+-- organization_id are served by the partial unique index
+-- ux_org_invites_org_email_pending (organization_id is its leading column), and
+-- token lookups by idx_org_invites_token_hash. The remaining unindexed path is
+-- the invitations list, which filters on organization_id and pages by
+-- created_at descending.
+
+CREATE INDEX IF NOT EXISTS idx_org_invites_org_created_at
+    ON public.organization_invitations (organization_id, created_at DESC);
@@ -0,0 +1,6 @@
+-- The duplicate-member check now reads organization_members_enriched directly
+-- (organization_id + email in one query), so the standalone auth.users lookup
+-- is no longer used. Drop it rather than keep an unused SECURITY DEFINER
+-- function over auth.users around.
+
+DROP FUNCTION IF EXISTS public.get_user_id_by_email(text);
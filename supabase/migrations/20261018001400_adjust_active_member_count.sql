@@ -0,0 +1,21 @@
+-- Atomic active_member_count adjustment.
+--
+-- The API used to read active_member_count, add or subtract one in Python and
+-- write the result back, which loses updates when two members join or leave
+-- at the same time. This applies the delta in a single UPDATE (never going
+-- below zero) and returns the new count.
+
+CREATE OR REPLACE FUNCTION public.adjust_active_member_count(p_org bigint, p_delta integer)
+RETURNS integer
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+    UPDATE public.organizations
+    SET active_member_count = greatest(coalesce(active_member_count, 0) + p_delta, 0)
+    WHERE id = p_org
+    RETURNING active_member_count;
+$$;
+
+REVOKE ALL ON FUNCTION public.adjust_active_member_count(bigint, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.adjust_active_member_count(bigint, integer) TO service_role;
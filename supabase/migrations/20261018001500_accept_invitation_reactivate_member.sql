@@ -0,0 +1,99 @@
+-- accept_organization_invitation: reactivate removed members.
+--
+-- Removing a member only marks the organization_members row inactive, so a
+-- re-invited user already has a row for the organization. Accepting now
+-- reactivates that row (with the invitation's role) and only inserts when the
+-- user never had one, instead of adding a duplicate membership.
+
+CREATE OR REPLACE FUNCTION public.accept_organization_invitation(p_token text, p_user uuid)
+RETURNS TABLE (status text, organization_id bigint, organization_name text, seat_count integer)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+    v_inv public.organization_invitations%ROWTYPE;
+    v_org public.organizations%ROWTYPE;
+    v_role_id bigint;
+BEGIN
+    SELECT * INTO v_inv
+    FROM public.organization_invitations i
+    WHERE i.token_hash = sha256(p_token::bytea)
+      AND i.status = 'pending'
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'not_found'::text, NULL::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    -- Status is flipped to 'expired' by the expire-organization-invitations
+    -- job; here we only refuse invitations it has not swept yet
+    IF v_inv.expires_at < now() THEN
+        RETURN QUERY SELECT 'expired'::text, v_inv.organization_id::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    SELECT * INTO v_org
+    FROM public.organizations o
+    WHERE o.id = v_inv.organization_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'organization_not_found'::text, v_inv.organization_id::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1
+        FROM public.organization_members m
+        WHERE m.organization_id = v_org.id
+          AND m.user_id = p_user
+          AND m.status = 'active'
+    ) THEN
+        UPDATE public.organization_invitations
+        SET status = 'accepted', accepted_at = now(), invitee_id = p_user
+        WHERE id = v_inv.id;
+
+        RETURN QUERY SELECT 'already_member'::text, v_org.id::bigint, v_org.name::text, v_org.seat_count::integer;
+        RETURN;
+    END IF;
+
+    IF v_org.plan_type::text = 'business'
+       AND v_org.stripe_subscription_id IS NOT NULL
+       AND coalesce(v_org.active_member_count, 0) >= coalesce(v_org.seat_count, 1) THEN
+        RETURN QUERY SELECT 'no_seats'::text, v_org.id::bigint, v_org.name::text, coalesce(v_org.seat_count, 1)::integer;
+        RETURN;
+    END IF;
+
+    v_role_id := coalesce(
+        v_inv.role_id,
+        (SELECT r.id FROM public.organization_member_roles r WHERE r.name = 'member' LIMIT 1),
+        3
+    );
+
+    -- Reactivate a previous (removed) membership rather than adding a second row
+    UPDATE public.organization_members m
+    SET status = 'active', role_id = v_role_id
+    WHERE m.organization_id = v_org.id
+      AND m.user_id = p_user;
+
+    IF NOT FOUND THEN
+        INSERT INTO public.organization_members (organization_id, user_id, role_id, status)
+        VALUES (v_org.id, p_user, v_role_id, 'active');
+    END IF;
+
+    UPDATE public.organization_invitations
+    SET status = 'accepted', accepted_at = now(), invitee_id = p_user
+    WHERE id = v_inv.id;
+
+    UPDATE public.organizations
+    SET active_member_count = coalesce(active_member_count, 0) + 1
+    WHERE id = v_org.id;
+
+    RETURN QUERY SELECT 'accepted'::text, v_org.id::bigint, v_org.name::text, v_org.seat_count::integer;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.accept_organization_invitation(text, uuid) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.accept_organization_invitation(text, uuid) TO service_role;
@@ -0,0 +1,127 @@
+-- One organization_members row per (organization, user).
+--
+-- accept_organization_invitation reactivates an existing row instead of
+-- inserting a second one, but nothing in the schema enforced that. With the
+-- unique index in place the reactivate-or-insert step becomes a single
+-- INSERT ... ON CONFLICT DO UPDATE.
+
+-- Keep one row per (organization, user): the oldest active row if there is
+-- one, otherwise the oldest row. Active duplicates were counted in
+-- active_member_count, so take them back out of it.
+WITH ranked AS (
+    SELECT m.id,
+           row_number() OVER (
+               PARTITION BY m.organization_id, m.user_id
+               ORDER BY (m.status = 'active') DESC, m.id
+           ) AS rn
+    FROM public.organization_members m
+), removed AS (
+    DELETE FROM public.organization_members m
+    USING ranked r
+    WHERE m.id = r.id
+      AND r.rn > 1
+    RETURNING m.organization_id, m.status
+)
+UPDATE public.organizations o
+SET active_member_count = greatest(coalesce(o.active_member_count, 0) - d.n, 0)
+FROM (
+    SELECT removed.organization_id, count(*) AS n
+    FROM removed
+    WHERE removed.status = 'active'
+    GROUP BY removed.organization_id
+) d
+WHERE o.id = d.organization_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_org_members_org_user
+    ON public.organization_members (organization_id, user_id);
+
+CREATE OR REPLACE FUNCTION public.accept_organization_invitation(p_token text, p_user uuid)
+RETURNS TABLE (status text, organization_id bigint, organization_name text, seat_count integer)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+#variable_conflict use_column
+-- organization_id is also an output column; the ON CONFLICT target below
+-- refers to the table column
+DECLARE
+    v_inv public.organization_invitations%ROWTYPE;
+    v_org public.organizations%ROWTYPE;
+    v_role_id bigint;
+BEGIN
+    SELECT * INTO v_inv
+    FROM public.organization_invitations i
+    WHERE i.token_hash = sha256(p_token::bytea)
+      AND i.status = 'pending'
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'not_found'::text, NULL::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    -- Status is flipped to 'expired' by the expire-organization-invitations
+    -- job; here we only refuse invitations it has not swept yet
+    IF v_inv.expires_at < now() THEN
+        RETURN QUERY SELECT 'expired'::text, v_inv.organization_id::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    SELECT * INTO v_org
+    FROM public.organizations o
+    WHERE o.id = v_inv.organization_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT 'organization_not_found'::text, v_inv.organization_id::bigint, NULL::text, NULL::integer;
+        RETURN;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1
+        FROM public.organization_members m
+        WHERE m.organization_id = v_org.id
+          AND m.user_id = p_user
+          AND m.status = 'active'
+    ) THEN
+        UPDATE public.organization_invitations
+        SET status = 'accepted', accepted_at = now(), invitee_id = p_user
+        WHERE id = v_inv.id;
+
+        RETURN QUERY SELECT 'already_member'::text, v_org.id::bigint, v_org.name::text, v_org.seat_count::integer;
+        RETURN;
+    END IF;
+
+    IF v_org.plan_type::text = 'business'
+       AND v_org.stripe_subscription_id IS NOT NULL
+       AND coalesce(v_org.active_member_count, 0) >= coalesce(v_org.seat_count, 1) THEN
+        RETURN QUERY SELECT 'no_seats'::text, v_org.id::bigint, v_org.name::text, coalesce(v_org.seat_count, 1)::integer;
+        RETURN;
+    END IF;
+
+    v_role_id := coalesce(
+        v_inv.role_id,
+        (SELECT r.id FROM public.organization_member_roles r WHERE r.name = 'member' LIMIT 1),
+        3
+    );
+
+    -- Insert the membership, or reactivate a previous (removed) one
+    INSERT INTO public.organization_members (organization_id, user_id, role_id, status)
+    VALUES (v_org.id, p_user, v_role_id, 'active')
+    ON CONFLICT (organization_id, user_id) DO UPDATE
+    SET status = 'active', role_id = EXCLUDED.role_id;
+
+    UPDATE public.organization_invitations
+    SET status = 'accepted', accepted_at = now(), invitee_id = p_user
+    WHERE id = v_inv.id;
+
+    UPDATE public.organizations
+    SET active_member_count = coalesce(active_member_count, 0) + 1
+    WHERE id = v_org.id;
+
+    RETURN QUERY SELECT 'accepted'::text, v_org.id::bigint, v_org.name::text, v_org.seat_count::integer;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.accept_organization_invitation(text, uuid) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.accept_organization_invitation(text, uuid) TO service_role;
@@ -0,0 +1,23 @@
+-- One stripe_events row per Stripe event ID.
+--
+-- Stripe redelivers events, and each delivery used to insert another row
+-- before the processed_at check. The webhook handler now inserts with
+-- ON CONFLICT (stripe_event_id) DO NOTHING and only looks the event up
+-- again when the insert was a no-op.
+
+-- Keep one row per event: a processed row if there is one, otherwise the
+-- earliest received
+DELETE FROM public.stripe_events e
+USING (
+    SELECT s.id,
+           row_number() OVER (
+               PARTITION BY s.stripe_event_id
+               ORDER BY (s.processed_at IS NOT NULL) DESC, s.received_at, s.id
+           ) AS rn
+    FROM public.stripe_events s
+) d
+WHERE e.id = d.id
+  AND d.rn > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_stripe_events_stripe_event_id
+    ON public.stripe_events (stripe_event_id);
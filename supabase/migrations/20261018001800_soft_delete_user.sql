@@ -0,0 +1,19 @@
+-- Soft-delete a user profile in a single call.
+--
+-- Sets user_profiles.deleted_at and returns it, or NULL when there is no
+-- profile for the user, so the API can keep its 404 without a second read.
+
+CREATE OR REPLACE FUNCTION public.soft_delete_user(p_user uuid)
+RETURNS timestamptz
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+    UPDATE public.user_profiles
+    SET deleted_at = now()
+    WHERE id = p_user
+    RETURNING deleted_at;
+$$;
+
+REVOKE ALL ON FUNCTION public.soft_delete_user(uuid) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.soft_delete_user(uuid) TO service_role;
@@ -0,0 +1,10 @@
+-- Page the invitations list on (created_at, id).
+--
+-- The list now orders by created_at DESC, id DESC and continues from the
+-- last (created_at, id) seen, so invitations created in the same instant are
+-- not skipped at page boundaries. Extend the list index with id to match.
+
+CREATE INDEX IF NOT EXISTS idx_org_invites_org_created_at_id
+    ON public.organization_invitations (organization_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS public.idx_org_invites_org_created_at;
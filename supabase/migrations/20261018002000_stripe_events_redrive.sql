@@ -0,0 +1,47 @@
+-- Re-drive Stripe events that were recorded but never processed.
+--
+-- The webhook endpoint records the event and answers 200 before handling it,
+-- so a worker that dies mid-handling leaves a row with processed_at NULL and
+-- Stripe will not retry it. Each API worker periodically claims such rows and
+-- handles them again.
+--
+-- redrive_attempted_at is the claim: a row is only handed out once per
+-- p_stale_after_seconds, and SKIP LOCKED keeps concurrent workers from
+-- claiming the same row. Rows older than Stripe's own 3 day retry window are
+-- left alone.
+
+ALTER TABLE public.stripe_events
+    ADD COLUMN IF NOT EXISTS redrive_attempted_at timestamptz;
+
+CREATE INDEX IF NOT EXISTS idx_stripe_events_unprocessed
+    ON public.stripe_events (received_at)
+    WHERE processed_at IS NULL;
+
+CREATE OR REPLACE FUNCTION public.claim_stripe_events_for_redrive(
+    p_stale_after_seconds integer,
+    p_limit integer
+)
+RETURNS SETOF public.stripe_events
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+    UPDATE public.stripe_events e
+    SET redrive_attempted_at = now()
+    WHERE e.id IN (
+        SELECT s.id
+        FROM public.stripe_events s
+        WHERE s.processed_at IS NULL
+          AND s.received_at < now() - make_interval(secs => p_stale_after_seconds)
+          AND s.received_at > now() - interval '3 days'
+          AND (s.redrive_attempted_at IS NULL
+               OR s.redrive_attempted_at < now() - make_interval(secs => p_stale_after_seconds))
+        ORDER BY s.received_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING e.*;
+$$;
+
+REVOKE ALL ON FUNCTION public.claim_stripe_events_for_redrive(integer, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_stripe_events_for_redrive(integer, integer) TO service_role;
@@ -0,0 +1,135 @@
+-- Report a duplicate pending invitation before the seat check.
+--
+-- create_organization_invitation checked seats first, so re-inviting an email
+-- that already had a valid pending invitation in a full organization returned
+-- no_seats, with that same invitation counted in the required seats. The API
+-- checked for the pending invitation first; restore that order.
+
+CREATE OR REPLACE FUNCTION public.create_organization_invitation(
+    p_org bigint,
+    p_inviter uuid,
+    p_email text,
+    p_role_id bigint,
+    p_token text,
+    p_expires_in_days integer DEFAULT 7
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+DECLARE
+    v_org public.organizations%ROWTYPE;
+    v_is_admin boolean;
+    v_pending integer;
+    v_projected integer;
+    v_inv public.organization_invitations%ROWTYPE;
+BEGIN
+    SELECT * INTO v_org
+    FROM public.organizations o
+    WHERE o.id = p_org
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'organization_not_found');
+    END IF;
+
+    SELECT coalesce(m.role_id IN (1, 2), false) INTO v_is_admin
+    FROM public.organization_members m
+    WHERE m.organization_id = p_org
+      AND m.user_id = p_inviter
+      AND m.status = 'active'
+    LIMIT 1;
+
+    IF v_is_admin IS NULL THEN
+        RETURN jsonb_build_object('status', 'not_member');
+    ELSIF NOT v_is_admin THEN
+        RETURN jsonb_build_object('status', 'not_admin');
+    END IF;
+
+    IF v_org.plan_type::text <> 'business' THEN
+        RETURN jsonb_build_object('status', 'plan_not_business', 'plan_type', v_org.plan_type);
+    END IF;
+
+    IF EXISTS (
+        SELECT 1
+        FROM public.organization_members m
+        JOIN auth.users u ON u.id = m.user_id
+        WHERE m.organization_id = p_org
+          AND m.status = 'active'
+          AND lower(u.email) = lower(p_email)
+    ) THEN
+        RETURN jsonb_build_object('status', 'already_member');
+    END IF;
+
+    -- Retire this email's pending invitation if it has already expired
+    UPDATE public.organization_invitations i
+    SET status = 'expired'
+    WHERE i.organization_id = p_org
+      AND i.invitee_email = p_email
+      AND i.status = 'pending'
+      AND i.expires_at <= now();
+
+    -- A still-valid pending invitation for this email is reported as such
+    -- before the seat check, which would otherwise count it against the
+    -- seats. The unique index on pending rows still catches a concurrent
+    -- insert below.
+    IF EXISTS (
+        SELECT 1
+        FROM public.organization_invitations i
+        WHERE i.organization_id = p_org
+          AND i.invitee_email = p_email
+          AND i.status = 'pending'
+    ) THEN
+        RETURN jsonb_build_object('status', 'pending_exists');
+    END IF;
+
+    IF v_org.stripe_subscription_id IS NOT NULL THEN
+        SELECT count(*)::integer INTO v_pending
+        FROM public.organization_invitations i
+        WHERE i.organization_id = p_org
+          AND i.status = 'pending';
+
+        v_projected := coalesce(v_org.active_member_count, 0) + v_pending + 1;
+
+        IF v_projected > coalesce(v_org.seat_count, 1) THEN
+            RETURN jsonb_build_object(
+                'status', 'no_seats',
+                'seats', coalesce(v_org.seat_count, 1),
+                'required', v_projected
+            );
+        END IF;
+    END IF;
+
+    BEGIN
+        INSERT INTO public.organization_invitations (
+            organization_id, inviter_id, invitee_email, invitee_id,
+            token, role_id, status, expires_at
+        )
+        VALUES (
+            p_org, p_inviter, p_email, NULL,
+            p_token, p_role_id, 'pending', now() + make_interval(days => p_expires_in_days)
+        )
+        RETURNING * INTO v_inv;
+    EXCEPTION WHEN unique_violation THEN
+        RETURN jsonb_build_object('status', 'pending_exists');
+    END;
+
+    RETURN jsonb_build_object(
+        'status', 'created',
+        'invitation', to_jsonb(v_inv) - 'token_hash',
+        'organization_name', v_org.name,
+        'role_name', (
+            SELECT r.name FROM public.organization_member_roles r WHERE r.id = p_role_id
+        ),
+        'inviter_name', (
+            SELECT p.name FROM public.user_profiles p WHERE p.id = p_inviter
+        )
+    );
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.create_organization_invitation(bigint, uuid, text, bigint, text, integer)
+    FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.create_organization_invitation(bigint, uuid, text, bigint, text, integer)
+    TO service_role;